@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 import pymysql
@@ -21,6 +22,8 @@ setattr(pymysql, 'version_info', (2, 2, 6, 'final', 0))
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -57,6 +60,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.RequestLoggingMiddleware',
+    'core.middleware.MetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'cms_project.urls'
@@ -157,6 +161,82 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'core.exceptions.custom_exception_handler',
 }
 
+# JSON rendering (core.renderers.CustomJSONRenderer). 'fast' writes the
+# response envelope as bytes; ENGINE 'auto' uses orjson when installed.
+API_RENDERER = {
+    'MODE': 'fast',
+    'ENGINE': 'auto',
+}
+
+# Request logging (core.middleware.RequestLoggingMiddleware)
+# MODE 'buffered' queues log rows in-process and writes them with bulk_create
+# from a background thread; see core/log_buffer.py for all options. Tests log
+# inline: the writer thread would commit outside each test's transaction.
+API_REQUEST_LOGGING = {
+    'MODE': 'sync' if TESTING else 'buffered',
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'OVERFLOW_POLICY': 'drop', # 'drop', 'sample' or 'block'
+    # Sampling and body capture per path prefix / status (see core.log_policy); first match wins
+    'POLICIES': [
+        {'prefix': '/api/v1/', 'status': '5xx', 'capture': 'full'},
+        {'prefix': '/api/v1/reports/', 'capture': 'headers'},
+    ],
+    'SAMPLING': {},            # e.g. {'/api/v1/search/': 0.1} logs one search request in ten
+    'CAPTURE': 'truncated',    # 'headers', 'truncated' (MAX_BODY_BYTES) or 'full'
+    # `manage.py archive_request_logs` moves older rows to gzipped NDJSON files
+    'RETENTION_DAYS': 30,
+    'ARCHIVE_DIR': BASE_DIR / 'log_archive',
+}
+
+# Per-route latency / query histograms (core.metrics), served at /api/v1/core/metrics/
+METRICS = {
+    'ENABLED': True,
+}
+
+# Payment processing (conferences.payments)
+# PaymentProcessView only queues jobs; `manage.py process_payments` charges them.
+PAYMENTS = {
+    'GATEWAY': 'conferences.payments.FakeGateway',
+    'WORKERS': 8,
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 30,
+}
+
+RECOMMENDATIONS = {
+    'TOP_K': 5,
+    'SPEAKER_WEIGHT': 2,
+    'SCORER': 'overlap',  # 'tfidf' ranks with NumPy (pip install numpy)
+}
+
+# Caching. Read endpoints cache their responses (core/cache.py) and are
+# invalidated by model signals; point ALIAS at a shared backend (e.g. Redis
+# or memcached) when running several processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cms-default',
+    },
+}
+
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+# Email (queued; delivered by `python manage.py send_emails`)
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'no-reply@cms.local'
+
+EMAIL_QUEUE = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,
+}
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ConferencesConfig(AppConfig):
     name = 'conferences'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,157 @@
+"""
+Outbound email queue.
+
+Requests only insert OutboundEmail rows. Workers (`manage.py send_emails`)
+claim due rows with a conditional UPDATE and deliver them over a single
+reused connection of the configured Django email backend. Failed sends are
+retried with exponential backoff. A dedupe key keeps repeated requests and
+re-run digests from queueing the same email twice.
+"""
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Attendee, OutboundEmail, Recommendation
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,    # seconds, doubled on every attempt
+    'LEASE_SECONDS': 300,
+}
+
+
+def get_email_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'EMAIL_QUEUE', {}))
+    return config
+
+
+def render_recommendations(attendee, sessions):
+    """Subject and body of a recommendation email."""
+    lines = ["Based on your interests, we recommend:"]
+    lines.extend(f"- {session.session_name} at {session.start_time}" for session in sessions)
+    return f"Session Recommendations for {attendee.attendee_name}", "\n".join(lines) + "\n"
+
+
+def queue_email(to_email, subject, body, attendee=None, dedupe_key=None):
+    """Queue one email and return (email, created). An existing dedupe_key returns the queued row."""
+    if dedupe_key:
+        return OutboundEmail.objects.get_or_create(dedupe_key=dedupe_key, defaults={
+            'attendee': attendee, 'to_email': to_email, 'subject': subject, 'body': body,
+        })
+    return OutboundEmail.objects.create(attendee=attendee, to_email=to_email, subject=subject, body=body), True
+
+
+def queue_recommendation_email(attendee, sessions):
+    """At most one recommendation email per attendee per day."""
+    sessions = list(sessions)
+    if not sessions:
+        return None, False
+    subject, body = render_recommendations(attendee, sessions)
+    return queue_email(attendee.email, subject, body, attendee=attendee,
+                       dedupe_key=f"recommendations:{attendee.pk}:{timezone.now().date()}")
+
+
+def queue_conference_digests(conference_id, chunk_size=500):
+    """
+    Queue a recommendation digest for every registered attendee of a
+    conference who has stored recommendations in it. Two queries and one
+    bulk INSERT per chunk. Returns the number of emails queued.
+    """
+    today = timezone.now().date()
+    attendee_ids = list(Attendee.objects.filter(
+        registration__conference_id=conference_id, registration__is_deleted=False, is_deleted=False
+    ).values_list('id', flat=True).distinct().order_by('id'))
+
+    queued = 0
+    for start in range(0, len(attendee_ids), chunk_size):
+        chunk = attendee_ids[start:start + chunk_size]
+        attendees = Attendee.objects.in_bulk(chunk)
+        sessions = {}
+        for recommendation in Recommendation.objects.filter(
+            attendee_id__in=chunk, session__conference_id=conference_id,
+            session__is_deleted=False, session__conference__is_deleted=False,
+        ).select_related('session').order_by('attendee_id', 'rank'):
+            sessions.setdefault(recommendation.attendee_id, []).append(recommendation.session)
+
+        emails = []
+        for attendee_id, recommended in sessions.items():
+            attendee = attendees[attendee_id]
+            subject, body = render_recommendations(attendee, recommended)
+            emails.append(OutboundEmail(
+                attendee=attendee, to_email=attendee.email, subject=subject, body=body,
+                dedupe_key=f"digest:{conference_id}:{attendee_id}:{today}",
+            ))
+        keys = [email.dedupe_key for email in emails]
+        existing = set(OutboundEmail.objects.filter(dedupe_key__in=keys).values_list('dedupe_key', flat=True))
+        emails = [email for email in emails if email.dedupe_key not in existing]
+        OutboundEmail.objects.bulk_create(emails, batch_size=chunk_size, ignore_conflicts=True)
+        queued += len(emails)
+    return queued
+
+
+def claim_emails(batch_size, lease_seconds):
+    """Claim up to batch_size due emails for this worker. Safe to run from several processes."""
+    now = timezone.now()
+    due = Q(status='Queued', next_attempt_at__lte=now) | Q(status='Sending', locked_until__lt=now)
+    candidates = list(OutboundEmail.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    OutboundEmail.objects.filter(due, pk__in=candidates).update(
+        status='Sending', claimed_by=token, locked_until=now + timedelta(seconds=lease_seconds),
+        attempts=F('attempts') + 1, updated_at=now,
+    )
+    return list(OutboundEmail.objects.filter(claimed_by=token, status='Sending'))
+
+
+def send_batch(batch_size=None, connection=None):
+    """Claim one batch and deliver it over one backend connection. Returns counts per outcome."""
+    config = get_email_config()
+    emails = claim_emails(batch_size or config['BATCH_SIZE'], config['LEASE_SECONDS'])
+    counts = {'claimed': len(emails), 'sent': 0, 'retried': 0, 'gave_up': 0}
+    if not emails:
+        return counts
+
+    sent = []
+    failures = []
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Email backend unavailable: {e}")
+        failures = [(email, str(e)) for email in emails]
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body, settings.DEFAULT_FROM_EMAIL, [email.to_email], connection=connection)
+                try:
+                    message.send()
+                    sent.append(email.pk)
+                except Exception as e:
+                    failures.append((email, str(e)))
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    if sent:
+        OutboundEmail.objects.filter(pk__in=sent).update(status='Sent', sent_at=now, locked_until=None, last_error='', updated_at=now)
+        counts['sent'] = len(sent)
+    for email, error in failures:
+        if email.attempts >= config['MAX_ATTEMPTS']:
+            OutboundEmail.objects.filter(pk=email.pk).update(status='Failed', locked_until=None, last_error=error[:1000], updated_at=now)
+            counts['gave_up'] += 1
+        else:
+            delay = config['RETRY_BACKOFF'] * (2 ** (email.attempts - 1))
+            OutboundEmail.objects.filter(pk=email.pk).update(
+                status='Queued', locked_until=None, last_error=error[:1000],
+                next_attempt_at=now + timedelta(seconds=delay), updated_at=now,
+            )
+            counts['retried'] += 1
+    return counts
@@ -0,0 +1,131 @@
+"""
+Seat inventory: one SeatInventory row per session holding `taken` and a copy
+of `capacity`. A registration claims its seat with
+
+    UPDATE ... SET taken = taken + 1 WHERE session_id = %s AND taken < capacity
+
+inside the registration's transaction. The row lock serializes concurrent
+buyers for the same session, so it cannot overbook, and no COUNT(*) runs.
+"""
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from .models import Registration, Session, SeatInventory
+from .stats import registration_snapshot
+
+
+def holds_seat(snapshot):
+    return snapshot is not None and not snapshot.is_deleted and snapshot.payment_status != 'Failed'
+
+
+def _count_taken(session_id):
+    return Registration.objects.filter(session_id=session_id, is_deleted=False).exclude(payment_status='Failed').count()
+
+
+def ensure_inventory(session):
+    """Create the inventory row from the current registrations if it doesn't exist yet."""
+    try:
+        with transaction.atomic():
+            SeatInventory.objects.get_or_create(
+                session_id=session.pk,
+                defaults={'capacity': session.max_attendees, 'taken': _count_taken(session.pk)},
+            )
+    except IntegrityError:
+        # Created concurrently by another buyer
+        pass
+
+
+def ensure_inventories(session_ids):
+    """Create the missing inventory rows for many sessions with one insert."""
+    missing = set(session_ids) - set(
+        SeatInventory.objects.filter(session_id__in=session_ids).values_list('session_id', flat=True)
+    )
+    if missing:
+        SeatInventory.objects.bulk_create([
+            SeatInventory(session_id=session_id, capacity=capacity, taken=taken)
+            for session_id, capacity, taken in _taken_by_session(missing)
+        ], ignore_conflicts=True)
+
+
+def claim_seat(session):
+    """Take one seat or raise ValidationError if the session is full."""
+    claimed = SeatInventory.objects.filter(session_id=session.pk, taken__lt=F('capacity')).update(taken=F('taken') + 1)
+    if not claimed and not SeatInventory.objects.filter(session_id=session.pk).exists():
+        ensure_inventory(session)
+        claimed = SeatInventory.objects.filter(session_id=session.pk, taken__lt=F('capacity')).update(taken=F('taken') + 1)
+    if not claimed:
+        raise ValidationError(f"Session '{session.session_name}' is full.")
+
+
+def release_seat(session_id):
+    SeatInventory.objects.filter(session_id=session_id, taken__gt=0).update(taken=F('taken') - 1)
+
+
+def reserve_seat(registration):
+    """
+    Bring the inventory in line with a registration that is about to be saved.
+    New seat holders claim conditionally; registrations that stop holding a
+    seat (failed payment, soft delete, moved session) release it.
+    """
+    if registration._state.adding:
+        before = None
+    else:
+        if not hasattr(registration, '_stats_snapshot'):
+            stored = Registration.objects.filter(pk=registration.pk).first()
+            registration._stats_snapshot = registration_snapshot(stored) if stored is not None else None
+        before = registration._stats_snapshot
+    after = registration_snapshot(registration)
+
+    had_seat = holds_seat(before)
+    needs_seat = holds_seat(after)
+    if had_seat and needs_seat and before.session_id == after.session_id:
+        return
+    if had_seat:
+        release_seat(before.session_id)
+    if needs_seat:
+        claim_seat(registration.session)
+
+
+def sync_capacity(session):
+    SeatInventory.objects.filter(session_id=session.pk).update(capacity=session.max_attendees)
+
+
+def _taken_by_session(session_ids):
+    return Session.objects.filter(pk__in=session_ids).annotate(
+        seats_taken=Count('registration', filter=Q(registration__is_deleted=False) & ~Q(registration__payment_status='Failed'))
+    ).values_list('id', 'max_attendees', 'seats_taken')
+
+
+def _session_chunks(chunk_size):
+    chunk = []
+    for session_id in Session.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        chunk.append(session_id)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild_inventory(chunk_size=1000):
+    """Recompute every inventory row from registrations. Returns the number of sessions."""
+    rebuilt = 0
+    for chunk in _session_chunks(chunk_size):
+        SeatInventory.objects.filter(session_id__in=chunk).delete()
+        SeatInventory.objects.bulk_create([
+            SeatInventory(session_id=session_id, capacity=capacity, taken=taken)
+            for session_id, capacity, taken in _taken_by_session(chunk)
+        ])
+        rebuilt += len(chunk)
+    return rebuilt
+
+
+def check_inventory(chunk_size=1000):
+    """Compare inventory rows with the registrations. Missing rows are created lazily and not reported."""
+    problems = []
+    for chunk in _session_chunks(chunk_size):
+        stored = {row[0]: row[1:] for row in SeatInventory.objects.filter(session_id__in=chunk).values_list('session_id', 'capacity', 'taken')}
+        for session_id, capacity, taken in _taken_by_session(chunk):
+            if session_id in stored and stored[session_id] != (capacity, taken):
+                problems.append(f"session {session_id}: inventory is {stored[session_id][1]}/{stored[session_id][0]}, expected {taken}/{capacity}")
+    return problems
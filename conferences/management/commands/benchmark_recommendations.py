@@ -0,0 +1,51 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from conferences.recommendations import DEFAULTS, TfidfIndex, TopicIndex, np, topic_vector
+
+class Command(BaseCommand):
+    help = 'Times the overlap and TF-IDF recommendation scorers on a synthetic conference (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attendees', type=int, default=10000)
+        parser.add_argument('--sessions', type=int, default=2000)
+        parser.add_argument('--preferences', type=int, default=5, help='Preferred sessions per attendee')
+        parser.add_argument('--top-k', type=int, default=DEFAULTS['TOP_K'])
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('NumPy is required for the TF-IDF scorer benchmark.')
+        rng = random.Random(options['seed'])
+        topics = [f'topic{i:03d}' for i in range(400)]
+        speakers = [f'Speaker {i}' for i in range(max(1, options['sessions'] // 10))]
+        begins = datetime(2026, 1, 1, 9)
+        sessions = [
+            (i, 1, ' '.join(rng.sample(topics, 3)), rng.choice(speakers), begins + timedelta(minutes=i))
+            for i in range(1, options['sessions'] + 1)
+        ]
+        vectors = {row[0]: topic_vector(row[2], row[3]) for row in sessions}
+        attendees = []
+        for attendee_id in range(1, options['attendees'] + 1):
+            preferred = rng.sample(range(1, options['sessions'] + 1), options['preferences'])
+            registered = set(rng.sample(range(1, options['sessions'] + 1), 2))
+            attendees.append((attendee_id, [(i, vectors[i]) for i in preferred], {1}, registered | set(preferred)))
+
+        self.stdout.write(f"{options['attendees']} attendees x {options['sessions']} sessions, top {options['top_k']}")
+        results = {}
+        for label, index_class in (('overlap', TopicIndex), ('tfidf', TfidfIndex)):
+            started = time.perf_counter()
+            index = index_class(sessions)
+            built = time.perf_counter()
+            results[label] = index.rank(attendees, options['top_k'])
+            finished = time.perf_counter()
+            self.stdout.write(
+                f"{label:>8}: index {built - started:.3f}s, ranking {finished - built:.3f}s "
+                f"({len(attendees) / (finished - built):,.0f} attendees/s)"
+            )
+
+        agreement = sum(
+            bool({s for s, _ in results['overlap'][a]} & {s for s, _ in results['tfidf'][a]}) for a, _, _, _ in attendees
+        ) / len(attendees)
+        self.stdout.write(self.style.SUCCESS(f"Top-{options['top_k']} lists sharing at least one session: {agreement:.0%}"))
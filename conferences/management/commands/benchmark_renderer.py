@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from rest_framework.response import Response
+from conferences.models import Conference, Session
+from conferences.serializers import SessionSerializer
+from core.renderers import CustomJSONRenderer, orjson
+
+class Command(BaseCommand):
+    help = 'Times CustomJSONRenderer modes on serialized sessions (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Sessions per payload')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        conference = Conference(pk=1, conference_name='Benchmark Conference')
+        begins = datetime(2026, 1, 1, 9, tzinfo=dt_timezone.utc)
+        sessions = [
+            Session(
+                pk=i, conference=conference, session_name=f'Session {i}: Scaling Python Services', speaker=f'Speaker {i % 50}',
+                start_time=begins + timedelta(minutes=30 * i), end_time=begins + timedelta(minutes=30 * i + 25),
+                max_attendees=100, price=Decimal('149.00'),
+            )
+            for i in range(1, options['rows'] + 1)
+        ]
+        payloads = {
+            'list': SessionSerializer(sessions, many=True).data,
+            'report': [  # report-style rows carry raw Decimals
+                {'id': s.pk, 'session': s.session_name, 'total_registrations': 40, 'revenue': s.price * 40} for s in sessions
+            ],
+        }
+        context = {'response': Response(status=200)}
+        modes = [('standard', 'stdlib'), ('fast', 'stdlib')]
+        if orjson is not None:
+            modes.append(('fast', 'orjson'))
+        else:
+            self.stdout.write('orjson is not installed; skipping the orjson engine.')
+
+        for name, data in payloads.items():
+            self.stdout.write(f"{name}: {options['rows']} rows x {options['iterations']} renders")
+            baseline = None
+            for mode, engine in modes:
+                renderer = CustomJSONRenderer()
+                renderer.mode, renderer.engine = mode, engine
+                started = time.perf_counter()
+                for _ in range(options['iterations']):
+                    content = renderer.render(data, 'application/json', context)
+                elapsed = (time.perf_counter() - started) / options['iterations']
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f"  {mode:>8}/{engine:<6} {elapsed * 1000:8.2f} ms/render  {baseline / elapsed:5.1f}x  ({len(content):,} bytes)"
+                )
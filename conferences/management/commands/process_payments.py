@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from conferences.payments import get_payment_config, process_batch
+
+class Command(BaseCommand):
+    help = 'Runs a payment worker: claims queued payment jobs and charges them concurrently'
+
+    def add_arguments(self, parser):
+        config = get_payment_config()
+        parser.add_argument('--workers', type=int, default=config['WORKERS'], help='Concurrent gateway calls')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'])
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = process_batch(workers=options['workers'], batch_size=options['batch_size'])
+            if counts['claimed']:
+                self.stdout.write(
+                    f"Processed {counts['claimed']} jobs: {counts['Paid']} paid, {counts['Failed']} failed, "
+                    f"{counts['retried']} retrying, {counts['gave_up']} gave up"
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Payment queue drained.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from conferences.recommendations import rebuild_recommendations
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored top session recommendations for every attendee'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        processed = rebuild_recommendations(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed recommendations for {processed} attendees.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.cache import invalidate
+from conferences.inventory import rebuild_inventory, check_inventory
+from conferences.stats import rebuild_all, check_stats
+
+class Command(BaseCommand):
+    help = 'Recomputes SessionStats/ConferenceStats and seat inventory from registrations, or checks them with --check'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report rows that differ from a fresh recomputation')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['check']:
+            problems = check_stats(chunk_size=options['chunk_size']) + check_inventory(chunk_size=options['chunk_size'])
+            for problem in problems:
+                self.stdout.write(problem)
+            if problems:
+                raise CommandError(f"{len(problems)} stats mismatches found. Run rebuild_stats to fix them.")
+            self.stdout.write(self.style.SUCCESS('Stats are consistent.'))
+            return
+
+        sessions, conferences = rebuild_all(chunk_size=options['chunk_size'])
+        rebuild_inventory(chunk_size=options['chunk_size'])
+        invalidate('conference', 'session', 'registration')
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {sessions} sessions and {conferences} conferences.'))
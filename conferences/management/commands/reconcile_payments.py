@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from conferences.payments import get_payment_config, reconcile_conference
+
+class Command(BaseCommand):
+    help = 'Charges every Pending registration of the given conferences in concurrent, bulk-applied chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', nargs='+', type=int)
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=get_payment_config()['WORKERS'], help='Concurrent gateway calls')
+
+    def handle(self, *args, **options):
+        for conference_id in options['conference_ids']:
+            metrics = reconcile_conference(
+                conference_id, chunk_size=options['chunk_size'], workers=options['workers'], log=self.stdout.write
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Conference {conference_id}: {metrics['processed']} registrations in {metrics['seconds']}s "
+                f"({metrics['per_second'] or 0}/s) - {metrics['Paid']} paid, {metrics['Failed']} failed, {metrics['errors']} errors"
+            ))
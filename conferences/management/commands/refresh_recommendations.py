@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from conferences.recommendations import refresh_stale_conferences
+
+class Command(BaseCommand):
+    help = 'Runs a recommendation worker: recomputes recommendations for conferences whose sessions changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=20, help='Conferences taken from the queue per pass')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Attendees recomputed per query batch')
+        parser.add_argument('--interval', type=float, default=10.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = refresh_stale_conferences(batch_size=options['batch_size'], chunk_size=options['chunk_size'])
+            if processed:
+                self.stdout.write(f"Refreshed recommendations for {processed} conferences")
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Recommendation queue drained.'))
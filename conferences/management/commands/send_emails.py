@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from conferences.emails import get_email_config, send_batch
+
+class Command(BaseCommand):
+    help = 'Runs an email worker: claims queued emails and delivers them in batches over one connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=get_email_config()['BATCH_SIZE'])
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = send_batch(batch_size=options['batch_size'])
+            if counts['claimed']:
+                self.stdout.write(
+                    f"Processed {counts['claimed']} emails: {counts['sent']} sent, "
+                    f"{counts['retried']} retrying, {counts['gave_up']} gave up"
+                )
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS('Email queue drained.'))
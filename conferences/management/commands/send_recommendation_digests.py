@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from conferences.emails import queue_conference_digests
+
+class Command(BaseCommand):
+    help = "Queues a recommendation digest for every registered attendee of the given conferences"
+
+    def add_arguments(self, parser):
+        parser.add_argument('conference_ids', nargs='+', type=int)
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for conference_id in options['conference_ids']:
+            queued = queue_conference_digests(conference_id, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Conference {conference_id}: queued {queued} digests."))
+        self.stdout.write("Run `python manage.py send_emails` to deliver them.")
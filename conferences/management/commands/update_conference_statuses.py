@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from conferences.services import update_conference_statuses
+
+class Command(BaseCommand):
+    help = 'Moves conferences between Upcoming, Ongoing and Completed based on their dates'
+
+    def handle(self, *args, **options):
+        moved = update_conference_statuses()
+        for status, count in moved.items():
+            self.stdout.write(f"-> {status}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Updated {sum(moved.values())} conferences."))
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0002_attendee_created_at_attendee_deleted_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConferenceStats',
+            fields=[
+                ('conference', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='conferences.conference')),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('unique_attendees', models.PositiveIntegerField(default=0)),
+                ('total_registrations', models.PositiveIntegerField(default=0)),
+                ('paid_registrations', models.PositiveIntegerField(default=0)),
+                ('pending_registrations', models.PositiveIntegerField(default=0)),
+                ('failed_registrations', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SessionStats',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='conferences.session')),
+                ('total_registrations', models.PositiveIntegerField(default=0)),
+                ('paid_registrations', models.PositiveIntegerField(default=0)),
+                ('pending_registrations', models.PositiveIntegerField(default=0)),
+                ('failed_registrations', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
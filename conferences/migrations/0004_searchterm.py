@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0003_conferencestats_sessionstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('conference', 'Conference'), ('session', 'Session')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term'], name='searchterm_kind_term_idx'), models.Index(fields=['kind', 'object_id'], name='searchterm_kind_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0005_registration_registration_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatInventory',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_inventory', serialize=False, to='conferences.session')),
+                ('capacity', models.PositiveIntegerField()),
+                ('taken', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0006_seatinventory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['conference', 'start_time', 'end_time'], name='session_schedule_idx'),
+        ),
+    ]
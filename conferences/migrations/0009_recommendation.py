@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0008_paymentjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('attendee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='conferences.attendee')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommended_to', to='conferences.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['attendee', 'rank'], name='recommendation_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0010_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('conference_id', models.BigIntegerField(unique=True)),
+                ('requested_at', models.DateTimeField()),
+            ],
+        ),
+    ]
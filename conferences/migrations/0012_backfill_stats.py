@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def backfill_stats(apps, schema_editor):
+    # Same recompute as `manage.py rebuild_stats`. It runs against the live models,
+    # which is why it sits after the last schema change rather than in 0003.
+    from conferences.stats import rebuild_all
+    rebuild_all()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0011_recommendationrefresh'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
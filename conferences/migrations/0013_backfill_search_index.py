@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_search_index(apps, schema_editor):
+    # Same rebuild as `manage.py rebuild_search_index`, run against the live models
+    from conferences.search import rebuild_index
+    rebuild_index()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0012_backfill_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_recommendations(apps, schema_editor):
+    # Same rebuild as `manage.py rebuild_recommendations`, run against the live models
+    from conferences.recommendations import rebuild_recommendations
+    rebuild_recommendations()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conferences', '0013_backfill_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_recommendations, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from core.models import BaseModel
@@ -21,13 +21,15 @@ class Conference(BaseModel):
     def update_status(self):
         today = timezone.now().date()
         if self.status != 'Cancelled':
+            previous = self.status
             if today < self.start_date:
                 self.status = 'Upcoming'
             elif self.start_date <= today <= self.end_date:
                 self.status = 'Ongoing'
             elif today > self.end_date:
                 self.status = 'Completed'
-            self.save()
+            if self.status != previous:
+                self.save(update_fields=['status', 'updated_at'])
 
     def clean(self):
         if self.start_date and self.end_date and self.start_date > self.end_date:
@@ -45,6 +47,12 @@ class Session(BaseModel):
     max_attendees = models.PositiveIntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    class Meta:
+        indexes = [
+            # Serves the overlap range query in clean() and agenda checks
+            models.Index(fields=['conference', 'start_time', 'end_time'], name='session_schedule_idx'),
+        ]
+
     def clean(self):
         if self.start_time and self.end_time:
             if self.start_time >= self.end_time:
@@ -63,7 +71,8 @@ class Session(BaseModel):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.session_name} ({self.conference.conference_name})"
@@ -93,13 +102,12 @@ class Registration(BaseModel):
 
     class Meta:
         unique_together = ('session', 'attendee')
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='registration_keyset_idx'),
+        ]
 
     def clean(self):
-        # 1. Capacity Check
-        if self.pk is None: # New registration
-             count = Registration.objects.filter(session=self.session, is_deleted=False).exclude(payment_status='Failed').count()
-             if count >= self.session.max_attendees:
-                 raise ValidationError(f"Session '{self.session.session_name}' is full.")
+        # 1. Capacity is enforced atomically by the seat inventory in save()
 
         # 2. Overlap Check for Attendee
         # Check if attendee is registered for any other session that overlaps with this one
@@ -115,7 +123,153 @@ class Registration(BaseModel):
 
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        from .inventory import reserve_seat
+        with transaction.atomic():
+            # Claims (or releases) the seat with a conditional UPDATE; raises if the session is full
+            reserve_seat(self)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.attendee.attendee_name} -> {self.session.session_name}"
+
+class SessionStats(models.Model):
+    """Precomputed registration totals for a session, kept current by conferences.stats."""
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_registrations = models.PositiveIntegerField(default=0)
+    paid_registrations = models.PositiveIntegerField(default=0)
+    pending_registrations = models.PositiveIntegerField(default=0)
+    failed_registrations = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for session {self.session_id}"
+
+class ConferenceStats(models.Model):
+    """Precomputed session and registration totals for a conference, kept current by conferences.stats."""
+    conference = models.OneToOneField(Conference, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    session_count = models.PositiveIntegerField(default=0)
+    unique_attendees = models.PositiveIntegerField(default=0)
+    total_registrations = models.PositiveIntegerField(default=0)
+    paid_registrations = models.PositiveIntegerField(default=0)
+    pending_registrations = models.PositiveIntegerField(default=0)
+    failed_registrations = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for conference {self.conference_id}"
+
+class SearchTerm(models.Model):
+    """Inverted index row: one normalized term of a conference or session, maintained by conferences.search."""
+    KIND_CHOICES = [
+        ('conference', 'Conference'),
+        ('session', 'Session'),
+    ]
+
+    term = models.CharField(max_length=64)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'term'], name='searchterm_kind_term_idx'),
+            models.Index(fields=['kind', 'object_id'], name='searchterm_kind_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind} {self.object_id}"
+
+class SeatInventory(models.Model):
+    """Seats taken per session, claimed with a conditional UPDATE by conferences.inventory."""
+    session = models.OneToOneField(Session, on_delete=models.CASCADE, primary_key=True, related_name='seat_inventory')
+    capacity = models.PositiveIntegerField()
+    taken = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Session {self.session_id}: {self.taken}/{self.capacity}"
+
+class PaymentJob(BaseModel):
+    """A queued payment attempt for a registration, processed by conferences.payments workers."""
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Processing', 'Processing'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    ]
+
+    registration = models.ForeignKey(Registration, on_delete=models.CASCADE, related_name='payment_jobs')
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    result = models.CharField(max_length=20, choices=Registration.PAYMENT_STATUS_CHOICES, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='paymentjob_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payment job {self.pk} for registration {self.registration_id} ({self.status})"
+
+class Recommendation(models.Model):
+    """One precomputed top-K entry for an attendee, maintained by conferences.recommendations."""
+    attendee = models.ForeignKey(Attendee, on_delete=models.CASCADE, related_name='recommendations')
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name='recommended_to')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['attendee', 'rank'], name='recommendation_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} for attendee {self.attendee_id}: session {self.session_id}"
+
+class RecommendationRefresh(models.Model):
+    """
+    A conference whose sessions changed since its attendees' recommendations
+    were computed. Queued by the Session signals, drained by `refresh_recommendations`.
+    """
+    # Not a foreign key: a marker may outlive a hard-deleted conference and is simply skipped
+    conference_id = models.BigIntegerField(unique=True)
+    requested_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Refresh recommendations for conference {self.conference_id}"
+
+class OutboundEmail(BaseModel):
+    """A queued email, delivered in batches by conferences.emails workers."""
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Failed', 'Failed'),
+    ]
+
+    attendee = models.ForeignKey(Attendee, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails')
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    dedupe_key = models.CharField(max_length=128, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outboundemail_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Email {self.pk} to {self.to_email} ({self.status})"
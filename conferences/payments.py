@@ -0,0 +1,290 @@
+"""
+Asynchronous payment processing.
+
+PaymentProcessView only enqueues a PaymentJob. Workers (`manage.py
+process_payments`) claim due jobs with a conditional UPDATE and call the
+configured gateway from a thread pool. Retryable gateway errors get
+exponential backoff. Outcomes are written back to registrations in bulk.
+"""
+import logging
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from core.cache import invalidate
+from .models import PaymentJob, Registration, SeatInventory
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'GATEWAY': 'conferences.payments.FakeGateway',
+    'WORKERS': 8,
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 30,    # seconds, doubled on every attempt
+    'LEASE_SECONDS': 300,   # a claimed job is handed out again if its worker dies
+}
+
+
+def get_payment_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'PAYMENTS', {}))
+    return config
+
+
+class GatewayError(Exception):
+    """A retryable gateway failure (timeout, 5xx, rate limit)."""
+
+
+class PaymentGateway:
+    """
+    Interface for payment providers. charge() returns 'Paid' or 'Failed' for a
+    definitive outcome and raises GatewayError when the attempt should be
+    retried. The idempotency key is stable across retries of the same job.
+    """
+
+    def charge(self, registration, amount, idempotency_key):
+        raise NotImplementedError
+
+
+class FakeGateway(PaymentGateway):
+    """Local stand-in: answers like services.check_payment_status() and remembers keys."""
+
+    def __init__(self, outcome=None, error_rate=0.0, latency=0.0):
+        self.outcome = outcome
+        self.error_rate = error_rate
+        self.latency = latency
+        self.charges = {}
+
+    def charge(self, registration, amount, idempotency_key):
+        from .services import check_payment_status
+        if self.latency:
+            time.sleep(self.latency)
+        if idempotency_key in self.charges:
+            return self.charges[idempotency_key]
+        if self.error_rate and random.random() < self.error_rate:
+            raise GatewayError("Simulated gateway timeout")
+        result = self.outcome or check_payment_status()
+        self.charges[idempotency_key] = result
+        return result
+
+
+def get_gateway():
+    return import_string(get_payment_config()['GATEWAY'])()
+
+
+def enqueue_payment(registration, idempotency_key=None):
+    """
+    Queue a payment for a registration and return (job, created). A repeated
+    idempotency key, or an unfinished job for the same registration, returns
+    the existing job instead of queueing another one.
+    """
+    if idempotency_key:
+        existing = PaymentJob.objects.filter(idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return _same_registration(existing, registration), False
+    pending = registration.payment_jobs.filter(status__in=['Queued', 'Processing']).first()
+    if pending is not None:
+        return pending, False
+    try:
+        with transaction.atomic():
+            job = PaymentJob.objects.create(registration=registration, idempotency_key=idempotency_key or uuid.uuid4().hex)
+    except IntegrityError:
+        if not idempotency_key:
+            raise
+        # A concurrent retry with the same key created the job first
+        return _same_registration(PaymentJob.objects.get(idempotency_key=idempotency_key), registration), False
+    return job, True
+
+
+def _same_registration(job, registration):
+    if job.registration_id != registration.pk:
+        raise ValidationError("This idempotency key was used for a different registration.")
+    return job
+
+
+def apply_payment_results(results):
+    """
+    Write {registration_id: 'Paid' | 'Failed'} back with one UPDATE per
+    status, then fix up seat inventory and stats for the rows that changed.
+    Returns the set of registration ids that were updated.
+    """
+    from . import stats
+
+    applied = set()
+    with transaction.atomic():
+        # Lock the registrations and decide from their current state, so rows that were
+        # deleted or settled concurrently are neither updated nor release a seat
+        rows = {
+            pk: (session_id, conference_id, status)
+            for pk, session_id, conference_id, status in Registration.objects.select_for_update()
+            .filter(pk__in=list(results), is_deleted=False).order_by('pk')
+            .values_list('id', 'session_id', 'conference_id', 'payment_status')
+        }
+        changed = {pk: new for pk, new in results.items() if pk in rows and rows[pk][2] != new}
+        # Failed -> Paid must win a seat again, which needs the conditional claim in Registration.save()
+        reclaim = [pk for pk, new in changed.items() if rows[pk][2] == 'Failed']
+        bulk = {pk: new for pk, new in changed.items() if pk not in reclaim}
+
+        for status in ('Paid', 'Failed'):
+            ids = [pk for pk, new in bulk.items() if new == status]
+            if ids:
+                Registration.objects.filter(pk__in=ids).update(payment_status=status, updated_at=timezone.now())
+                applied.update(ids)
+
+        # Only rows that held a seat (Pending/Paid) and are now Failed give it back
+        released = {}
+        for pk, new in bulk.items():
+            if new == 'Failed':
+                released[rows[pk][0]] = released.get(rows[pk][0], 0) + 1
+        if released:
+            SeatInventory.objects.filter(session_id__in=released).update(taken=F('taken') - Case(
+                *[When(session_id=session_id, then=Value(count)) for session_id, count in released.items()],
+                default=Value(0), output_field=IntegerField(),
+            ))
+        if applied:
+            stats.recompute_session_stats({rows[pk][0] for pk in applied})
+            stats.recompute_conference_stats({rows[pk][1] for pk in applied})
+            # Bulk UPDATEs bypass the model signals
+            invalidate('registration')
+
+    for pk in reclaim:
+        registration = Registration.objects.get(pk=pk)
+        registration.payment_status = changed[pk]
+        try:
+            registration.save()
+            applied.add(pk)
+        except ValidationError as e:
+            logger.warning(f"Could not mark registration {pk} as {changed[pk]}: {e}")
+    return applied
+
+
+def claim_jobs(batch_size, lease_seconds):
+    """Claim up to batch_size due jobs for this worker. Safe to run from several processes."""
+    now = timezone.now()
+    due = Q(status='Queued', next_attempt_at__lte=now) | Q(status='Processing', locked_until__lt=now)
+    candidates = list(PaymentJob.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not candidates:
+        return []
+    token = uuid.uuid4().hex
+    PaymentJob.objects.filter(due, pk__in=candidates).update(
+        status='Processing', claimed_by=token, locked_until=now + timedelta(seconds=lease_seconds),
+        attempts=F('attempts') + 1, updated_at=now,
+    )
+    return list(PaymentJob.objects.filter(claimed_by=token, status='Processing').select_related('registration__session'))
+
+
+def _charge(gateway, job):
+    try:
+        return job, gateway.charge(job.registration, job.registration.session.price, job.idempotency_key), None
+    except GatewayError as e:
+        return job, None, str(e)
+    except Exception as e:
+        logger.error(f"Payment job {job.pk} crashed: {e}")
+        return job, None, str(e)
+    finally:
+        close_old_connections()
+
+
+def process_batch(gateway=None, workers=None, batch_size=None):
+    """Claim one batch, charge it concurrently and record the outcomes. Returns counts per outcome."""
+    config = get_payment_config()
+    gateway = gateway or get_gateway()
+    jobs = claim_jobs(batch_size or config['BATCH_SIZE'], config['LEASE_SECONDS'])
+    counts = {'claimed': len(jobs), 'Paid': 0, 'Failed': 0, 'retried': 0, 'gave_up': 0}
+    if not jobs:
+        return counts
+
+    with ThreadPoolExecutor(max_workers=workers or config['WORKERS']) as pool:
+        outcomes = list(pool.map(lambda job: _charge(gateway, job), jobs))
+
+    results = {}
+    completed = {}
+    retries = []
+    gave_up = []
+    for job, result, error in outcomes:
+        if result in ('Paid', 'Failed'):
+            results[job.registration_id] = result
+            completed.setdefault(result, []).append(job.pk)
+            counts[result] += 1
+        elif job.attempts >= config['MAX_ATTEMPTS']:
+            gave_up.append((job.pk, error or 'Unknown gateway response'))
+            counts['gave_up'] += 1
+        else:
+            retries.append((job, error or 'Unknown gateway response'))
+            counts['retried'] += 1
+
+    apply_payment_results(results)
+
+    now = timezone.now()
+    for result, ids in completed.items():
+        PaymentJob.objects.filter(pk__in=ids).update(status='Completed', result=result, locked_until=None, last_error='', updated_at=now)
+    for job, error in retries:
+        delay = config['RETRY_BACKOFF'] * (2 ** (job.attempts - 1))
+        PaymentJob.objects.filter(pk=job.pk).update(
+            status='Queued', locked_until=None, last_error=error[:1000],
+            next_attempt_at=now + timedelta(seconds=delay), updated_at=now,
+        )
+    for pk, error in gave_up:
+        PaymentJob.objects.filter(pk=pk).update(status='Failed', locked_until=None, last_error=error[:1000], updated_at=now)
+    return counts
+
+
+def reconcile_conference(conference_id, chunk_size=500, workers=None, gateway=None, log=None):
+    """
+    Charge every Pending registration of a conference, chunk by chunk: the
+    gateway is called from a thread pool and each chunk's outcomes are applied
+    with bulk UPDATEs. Registrations with a queued payment job are skipped.
+    Returns throughput metrics.
+    """
+    config = get_payment_config()
+    gateway = gateway or get_gateway()
+    workers = workers or config['WORKERS']
+    metrics = {'conference': conference_id, 'processed': 0, 'Paid': 0, 'Failed': 0, 'errors': 0, 'chunks': 0}
+    started = time.monotonic()
+
+    pending = Registration.objects.filter(conference_id=conference_id, payment_status='Pending', is_deleted=False).exclude(
+        payment_jobs__status__in=['Queued', 'Processing']
+    ).select_related('session').order_by('id')
+
+    last_id = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            chunk = list(pending.filter(pk__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].pk
+            chunk_started = time.monotonic()
+
+            def charge(registration):
+                try:
+                    return registration.pk, gateway.charge(registration, registration.session.price, f"reconcile-{registration.pk}")
+                except Exception as e:
+                    logger.warning(f"Reconciling registration {registration.pk} failed: {e}")
+                    return registration.pk, None
+
+            results = {}
+            for pk, result in pool.map(charge, chunk):
+                if result in ('Paid', 'Failed'):
+                    results[pk] = result
+                    metrics[result] += 1
+                else:
+                    metrics['errors'] += 1
+            apply_payment_results(results)
+
+            metrics['processed'] += len(chunk)
+            metrics['chunks'] += 1
+            if log:
+                elapsed = time.monotonic() - chunk_started
+                log(f"Chunk {metrics['chunks']}: {len(chunk)} registrations in {elapsed:.2f}s ({len(chunk) / elapsed if elapsed else 0:.0f}/s)")
+
+    metrics['seconds'] = round(time.monotonic() - started, 3)
+    metrics['per_second'] = round(metrics['processed'] / metrics['seconds'], 1) if metrics['seconds'] else None
+    return metrics
@@ -0,0 +1,364 @@
+"""
+Precomputed session recommendations.
+
+Sessions are tokenized into sparse topic vectors (name keywords plus the
+speaker). An attendee's profile is the sum of the vectors of their preferred
+sessions, and candidates are found through an inverted index from feature to
+sessions instead of an OR of LIKE clauses. With SCORER = 'tfidf' and NumPy
+installed, sessions become sparse L2-normalized TF-IDF rows instead and a
+whole batch of attendees is scored with vectorized sparse products. The top K per attendee
+is stored in Recommendation rows and refreshed by signals when preferences
+or registrations change (registrations once their transaction commits, so
+seat locks are not held while scoring). A session change can reorder the lists of every
+attendee of its conference, so it only queues the conference
+(RecommendationRefresh) for the `refresh_recommendations` worker.
+"""
+import heapq
+import logging
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from .models import Attendee, Recommendation, RecommendationRefresh, Registration, Session
+from .search import tokenize
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TOP_K': 5,
+    'SPEAKER_WEIGHT': 2,
+    'SCORER': 'overlap',        # 'overlap' (feature overlap via the inverted index) or 'tfidf' (needs NumPy)
+    'BATCH_SIZE': 1000,         # attendees scored together under 'tfidf'
+}
+TOPIC_STOP_WORDS = {'session', 'workshop'}
+MIN_KEYWORD_LENGTH = 4
+
+
+def get_recommendation_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'RECOMMENDATIONS', {}))
+    return config
+
+
+def topic_vector(session_name, speaker, speaker_weight=DEFAULTS['SPEAKER_WEIGHT']):
+    """Sparse feature vector of a session: ('kw', term) and ('speaker', name) keys."""
+    vector = Counter({
+        ('kw', term): 1 for term in tokenize(session_name)
+        if len(term) >= MIN_KEYWORD_LENGTH and term not in TOPIC_STOP_WORDS
+    })
+    speaker = (speaker or '').strip().lower()
+    if speaker:
+        vector[('speaker', speaker)] = speaker_weight
+    return vector
+
+
+class TopicIndex:
+    """Topic vectors and an inverted index (feature -> session ids) over a fixed set of sessions."""
+
+    def __init__(self, sessions, speaker_weight=DEFAULTS['SPEAKER_WEIGHT']):
+        self.vectors = {}
+        self.conference = {}
+        self.start_time = {}
+        self.postings = defaultdict(list)
+        for session_id, conference_id, session_name, speaker, start_time in sessions:
+            vector = topic_vector(session_name, speaker, speaker_weight)
+            self.vectors[session_id] = vector
+            self.conference[session_id] = conference_id
+            self.start_time[session_id] = start_time
+            for feature in vector:
+                self.postings[feature].append(session_id)
+
+    def top_k(self, profile, conference_ids, exclude, k):
+        """Best k (session_id, score) by dot product with `profile`, ties broken by start time."""
+        scores = defaultdict(float)
+        for feature, weight in profile.items():
+            for session_id in self.postings.get(feature, ()):
+                scores[session_id] += weight * self.vectors[session_id][feature]
+        candidates = [
+            (session_id, score) for session_id, score in scores.items()
+            if session_id not in exclude and self.conference[session_id] in conference_ids
+        ]
+        return heapq.nsmallest(k, candidates, key=lambda item: (-item[1], self.start_time[item[0]], item[0]))
+
+    def rank(self, attendees, k):
+        """
+        `attendees` is a list of (attendee_id, preferred, conference_ids, exclude)
+        where `preferred` holds (session_id, topic vector) pairs.
+        Returns {attendee_id: [(session_id, score), ...]}.
+        """
+        ranked = {}
+        for attendee_id, preferred, conference_ids, exclude in attendees:
+            profile = Counter()
+            for _, vector in preferred:
+                profile.update(vector)
+            ranked[attendee_id] = self.top_k(profile, conference_ids, exclude, k)
+        return ranked
+
+
+class TfidfIndex:
+    """
+    Sessions as L2-normalized TF-IDF rows over their topic features, stored
+    sparsely: flat (session, feature, weight) arrays in CSR order for reading
+    a session's row, and the same entries regrouped by feature (postings) for
+    scoring. Memory grows with the number of non-zero weights, not with
+    sessions x vocabulary. An attendee's profile is the sum of their
+    preferred sessions' rows; each session's score is the dot product with
+    it, accumulated from the postings of the profile's features only.
+    """
+
+    def __init__(self, sessions, speaker_weight=DEFAULTS['SPEAKER_WEIGHT'], batch_size=DEFAULTS['BATCH_SIZE']):
+        if np is None:
+            raise ImproperlyConfigured("The 'tfidf' recommendation scorer requires NumPy.")
+        self.batch_size = batch_size
+        self.speaker_weight = speaker_weight
+        # Position in (start_time, id) order doubles as the tie-breaker
+        sessions = sorted(sessions, key=lambda row: (row[4], row[0]))
+        self.session_ids = np.array([row[0] for row in sessions], dtype=np.int64)
+        self.position = {session_id: i for i, session_id in enumerate(self.session_ids.tolist())}
+        conference_ids = [row[1] for row in sessions]
+        self.conference_index = {conference_id: i for i, conference_id in enumerate(dict.fromkeys(conference_ids))}
+        self.session_conference = np.array([self.conference_index[c] for c in conference_ids], dtype=np.int64)
+
+        self.vocabulary = {}
+        entry_sessions, entry_features, entry_counts = [], [], []
+        for i, row in enumerate(sessions):
+            for feature, count in topic_vector(row[2], row[3], speaker_weight).items():
+                entry_sessions.append(i)
+                entry_features.append(self.vocabulary.setdefault(feature, len(self.vocabulary)))
+                entry_counts.append(count)
+        entry_sessions = np.array(entry_sessions, dtype=np.int64)
+        features = np.array(entry_features, dtype=np.int64)
+        size = len(self.vocabulary)
+
+        document_frequency = np.bincount(features, minlength=size)
+        self.idf = (np.log((1 + len(sessions)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weights = np.array(entry_counts, dtype=np.float32) * self.idf[features]
+        norms = np.sqrt(np.bincount(entry_sessions, weights * weights, minlength=len(sessions))).astype(np.float32)
+        weights /= norms[entry_sessions]
+
+        # Rows: entries are already grouped by session
+        self.row_ptr = _pointers(entry_sessions, len(sessions))
+        self.row_features, self.row_weights = features, weights
+        # Postings: the same entries grouped by feature, sessions ascending within each
+        order = np.argsort(features, kind='stable')
+        self.posting_ptr = _pointers(features[order], size)
+        self.posting_sessions, self.posting_weights = entry_sessions[order], weights[order]
+
+    def vectorize(self, vector):
+        """Sparse TF-IDF row (feature ids, weights) for a topic vector; unknown features are ignored."""
+        known = [(self.vocabulary[feature], count) for feature, count in vector.items() if feature in self.vocabulary]
+        features = np.array([j for j, _ in known], dtype=np.int64)
+        weights = np.array([count for _, count in known], dtype=np.float32) * self.idf[features]
+        norm = np.sqrt(np.dot(weights, weights))
+        return features, (weights / norm if norm > 0 else weights)
+
+    def rank(self, attendees, k):
+        """Same contract as TopicIndex.rank; scores are cosine similarities summed over preferences."""
+        ranked = {}
+        for start in range(0, len(attendees), self.batch_size):
+            batch = attendees[start:start + self.batch_size]
+            ranked.update((attendee_id, []) for attendee_id, _, _, _ in batch)
+            rows, positions, scores = self._filter(batch, *self._score_batch(batch))
+            # Per attendee: highest score first, then earliest session (positions follow start order)
+            order = np.lexsort((positions, -scores, rows))
+            rows, positions, scores = rows[order], positions[order], scores[order]
+            first = np.searchsorted(rows, rows, side='left')
+            top = np.flatnonzero(np.arange(len(rows)) - first < k)
+            for i in top.tolist():
+                ranked[batch[rows[i]][0]].append((int(self.session_ids[positions[i]]), float(scores[i])))
+        return ranked
+
+    def _score_batch(self, batch):
+        """
+        Sparse scores for a batch of attendees as parallel (attendee row, session
+        position, score) arrays, built from each profile's postings only.
+        """
+        size = len(self.vocabulary)
+        # Profiles: the preferred sessions' rows, keyed by (attendee row, feature)
+        pairs = np.array([(i, self.position[session_id]) for i, (_, preferred, _, _) in enumerate(batch)
+                          for session_id, _ in preferred if session_id in self.position], dtype=np.int64).reshape(-1, 2)
+        owners, preferred_positions = pairs[:, 0], pairs[:, 1]
+        entries = _gather(self.row_ptr, preferred_positions)
+        lengths = self.row_ptr[preferred_positions + 1] - self.row_ptr[preferred_positions]
+        keys = [np.repeat(owners, lengths) * size + self.row_features[entries]]
+        values = [self.row_weights[entries]]
+        for i, (_, preferred, _, _) in enumerate(batch):
+            for session_id, vector in preferred:
+                if session_id not in self.position:
+                    features, weights = self.vectorize(vector)
+                    keys.append(i * size + features)
+                    values.append(weights)
+        profile_keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        profile_weights = np.bincount(inverse, np.concatenate(values))
+        profile_rows, features = np.divmod(profile_keys, max(size, 1))
+
+        # Scores: every posting of every profile feature, summed per (attendee row, session)
+        entries = _gather(self.posting_ptr, features)
+        lengths = self.posting_ptr[features + 1] - self.posting_ptr[features]
+        score_keys = np.repeat(profile_rows, lengths) * len(self.session_ids) + self.posting_sessions[entries]
+        score_keys, inverse = np.unique(score_keys, return_inverse=True)
+        scores = np.bincount(inverse, self.posting_weights[entries] * np.repeat(profile_weights, lengths))
+        rows, positions = np.divmod(score_keys, max(len(self.session_ids), 1))
+        return rows, positions, scores
+
+    def _filter(self, batch, rows, positions, scores):
+        """Drop zero scores, sessions outside the attendee's conferences and excluded sessions."""
+        allowed = np.zeros((len(batch), len(self.conference_index)), dtype=bool)
+        excluded = []
+        for i, (_, _, conference_ids, exclude) in enumerate(batch):
+            for conference_id in conference_ids:
+                if conference_id in self.conference_index:
+                    allowed[i, self.conference_index[conference_id]] = True
+            excluded.extend(i * len(self.session_ids) + self.position[session_id]
+                            for session_id in exclude if session_id in self.position)
+        keep = (scores > 1e-6) & allowed[rows, self.session_conference[positions]]
+        if excluded:
+            keep &= ~np.isin(rows * len(self.session_ids) + positions, excluded)
+        return rows[keep], positions[keep], scores[keep]
+
+
+def _pointers(groups, size):
+    """CSR offsets for entries sorted by group: entries of group g are [ptr[g], ptr[g + 1])."""
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(groups, minlength=size), out=ptr[1:])
+    return ptr
+
+
+def _gather(ptr, groups):
+    """Entry indices of every group in `groups`, concatenated, without a Python loop."""
+    starts = ptr[groups]
+    lengths = ptr[groups + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(lengths.sum(), dtype=np.int64)
+
+
+def build_index(sessions, config=None):
+    """The index for the configured scorer, falling back to TopicIndex without NumPy."""
+    config = config or get_recommendation_config()
+    if config['SCORER'] == 'tfidf':
+        if np is not None:
+            return TfidfIndex(sessions, config['SPEAKER_WEIGHT'], config['BATCH_SIZE'])
+        logger.warning("RECOMMENDATIONS['SCORER'] is 'tfidf' but NumPy is not installed; using 'overlap'.")
+    elif config['SCORER'] != 'overlap':
+        raise ImproperlyConfigured(f"Unknown recommendation scorer: {config['SCORER']}")
+    return TopicIndex(sessions, config['SPEAKER_WEIGHT'])
+
+
+def refresh_attendees(attendee_ids):
+    """Recompute and store the top K for the given attendees with a fixed number of queries."""
+    attendee_ids = set(attendee_ids)
+    if not attendee_ids:
+        return 0
+    config = get_recommendation_config()
+
+    preferences = defaultdict(list)
+    rows = Attendee.preferences.through.objects.filter(attendee_id__in=attendee_ids).values_list(
+        'attendee_id', 'session_id', 'session__conference_id', 'session__session_name', 'session__speaker'
+    )
+    for attendee_id, *preference in rows:
+        preferences[attendee_id].append(preference)
+
+    registered = defaultdict(set)
+    for attendee_id, session_id in Registration.objects.filter(attendee_id__in=preferences).values_list('attendee_id', 'session_id'):
+        registered[attendee_id].add(session_id)
+
+    conference_ids = {conference_id for items in preferences.values() for _, conference_id, _, _ in items}
+    index = build_index(
+        Session.objects.filter(conference_id__in=conference_ids, is_deleted=False).values_list(
+            'id', 'conference_id', 'session_name', 'speaker', 'start_time'
+        ),
+        config,
+    )
+
+    attendees = []
+    for attendee_id, items in preferences.items():
+        preferred = [
+            (session_id, topic_vector(session_name, speaker, config['SPEAKER_WEIGHT']))
+            for session_id, _, session_name, speaker in items
+        ]
+        exclude = registered[attendee_id] | {session_id for session_id, _, _, _ in items}
+        conferences = {conference_id for _, conference_id, _, _ in items}
+        attendees.append((attendee_id, preferred, conferences, exclude))
+
+    recommendations = []
+    for attendee_id, ranked in index.rank(attendees, config['TOP_K']).items():
+        for rank, (session_id, score) in enumerate(ranked, 1):
+            recommendations.append(Recommendation(attendee_id=attendee_id, session_id=session_id, rank=rank, score=score))
+
+    with transaction.atomic():
+        Recommendation.objects.filter(attendee_id__in=attendee_ids).delete()
+        Recommendation.objects.bulk_create(recommendations, batch_size=1000)
+    return len(recommendations)
+
+
+def refresh_attendees_on_commit(attendee_ids):
+    """
+    Refresh once the caller's transaction commits, so a booking does not hold
+    its seat inventory lock while recommendations are re-scored.
+    """
+    attendee_ids = set(attendee_ids)
+    if attendee_ids:
+        transaction.on_commit(lambda: refresh_attendees(attendee_ids))
+
+
+def _chunked(ids, size):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def refresh_conferences(conference_ids, chunk_size=500):
+    """Refresh every attendee whose preferences touch one of the conferences."""
+    attendee_ids = Attendee.preferences.through.objects.filter(
+        session__conference_id__in=list(conference_ids)
+    ).values_list('attendee_id', flat=True).distinct()
+    for chunk in _chunked(attendee_ids, chunk_size):
+        refresh_attendees(chunk)
+
+
+def mark_conferences_stale(conference_ids):
+    """
+    Queue a refresh for the conferences' attendees instead of recomputing
+    inline. Runs in the caller's transaction, so a rolled back change queues nothing.
+    """
+    now = timezone.now()
+    for conference_id in set(conference_ids):
+        # Re-marking bumps requested_at, so a refresh already in progress doesn't clear the new request
+        if not RecommendationRefresh.objects.filter(conference_id=conference_id).update(requested_at=now):
+            RecommendationRefresh.objects.bulk_create(
+                [RecommendationRefresh(conference_id=conference_id, requested_at=now)], ignore_conflicts=True
+            )
+
+
+def refresh_stale_conferences(batch_size=20, chunk_size=500):
+    """Refresh the oldest queued conferences. Returns the number of conferences processed."""
+    queued = list(RecommendationRefresh.objects.order_by('requested_at').values_list('pk', 'conference_id', 'requested_at')[:batch_size])
+    for pk, conference_id, requested_at in queued:
+        refresh_conferences([conference_id], chunk_size=chunk_size)
+        RecommendationRefresh.objects.filter(pk=pk, requested_at=requested_at).delete()
+    return len(queued)
+
+
+def rebuild_recommendations(chunk_size=500):
+    """Recompute the store for every attendee. Returns the number of attendees processed."""
+    Recommendation.objects.all().delete()
+    processed = 0
+    attendee_ids = Attendee.objects.filter(preferences__isnull=False).values_list('id', flat=True).distinct().order_by('id')
+    for chunk in _chunked(attendee_ids, chunk_size):
+        refresh_attendees(chunk)
+        processed += len(chunk)
+    return processed
+
+
+def recommended_sessions(attendee_id):
+    """Stored recommendations for an attendee, best first, as one query."""
+    # Soft deletes only queue a refresh, so stored rows can briefly point at deleted sessions
+    return Session.objects.filter(
+        recommended_to__attendee_id=attendee_id, is_deleted=False, conference__is_deleted=False
+    ).select_related('conference').order_by('recommended_to__rank')
@@ -0,0 +1,99 @@
+"""
+In-memory schedule conflict detection.
+
+IntervalIndex is a static augmented interval tree laid out over a list
+sorted by start time: each subtree remembers its largest end time, so a
+query only descends into subtrees that can still overlap. That gives
+O(log n + k) lookups. It is used to check whole agendas and batches of
+registrations with one query to load the existing schedule, instead of
+one range query per item. Intervals accepted while a batch is checked go
+into a DisjointIntervals list, which stays cheap to grow.
+"""
+from bisect import bisect_right, insort
+
+
+class IntervalIndex:
+    """Half-open [start, end) intervals with an attached payload."""
+
+    def __init__(self, items=()):
+        self._items = sorted(items, key=lambda item: (item[0], item[1]))
+        self._max_end = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def _build(self):
+        self._max_end = [None] * len(self._items)
+
+        def build(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            best = self._items[mid][1]
+            for child in (build(lo, mid), build(mid + 1, hi)):
+                if child is not None and child > best:
+                    best = child
+            self._max_end[mid] = best
+            return best
+
+        build(0, len(self._items))
+
+    def overlapping(self, start, end):
+        """Return (start, end, payload) for every stored interval overlapping [start, end)."""
+        if self._max_end is None:
+            self._build()
+        found = []
+        stack = [(0, len(self._items))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            item = self._items[mid]
+            if item[0] < end:
+                if item[1] > start:
+                    found.append(item)
+                stack.append((mid + 1, hi))
+        found.sort(key=lambda item: (item[0], item[1]))
+        return found
+
+    def overlaps(self, start, end):
+        return bool(self.overlapping(start, end))
+
+
+class DisjointIntervals:
+    """
+    Sorted, pairwise non-overlapping [start, end) intervals. Only the
+    neighbours of a new interval can overlap it, so checks are a bisect.
+    """
+
+    def __init__(self):
+        self._items = []
+
+    def overlaps(self, start, end):
+        index = bisect_right(self._items, start, key=lambda item: item[0])
+        if index and self._items[index - 1][1] > start:
+            return True
+        return index < len(self._items) and self._items[index][0] < end
+
+    def add(self, start, end):
+        """Insert an interval known not to overlap the stored ones."""
+        insort(self._items, (start, end))
+
+
+def find_conflicts(intervals):
+    """
+    All overlapping pairs within one list of (start, end, payload), via a
+    sweep over start times. Returns (payload_a, payload_b) pairs.
+    """
+    ordered = sorted(intervals, key=lambda item: (item[0], item[1]))
+    active = []
+    conflicts = []
+    for start, end, payload in ordered:
+        active = [item for item in active if item[1] > start]
+        conflicts.extend((item[2], payload) for item in active)
+        active.append((start, end, payload))
+    return conflicts
@@ -0,0 +1,110 @@
+"""
+Search over conferences and sessions backed by the SearchTerm inverted index.
+
+Each indexed field is tokenized into lowercase terms with a per-field weight.
+Queries match terms by prefix (an index range scan instead of LIKE '%q%'),
+require every query token to match, and rank by summed weight.
+"""
+import re
+from django.db.models import Case, IntegerField, Max, Q, Sum, Value, When
+from .models import Conference, Session, SearchTerm
+from .serializers import ConferenceSerializer, SessionSerializer
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+STOP_WORDS = {'the', 'a', 'an', 'in', 'on', 'at', 'for', 'to', 'of', 'and', 'or', 'is', 'with'}
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TOKENS = 8
+
+FIELD_WEIGHTS = {
+    'conference': {'conference_name': 3, 'location': 1, 'description': 1},
+    'session': {'session_name': 3, 'speaker': 2},
+}
+MODELS = {'conference': Conference, 'session': Session}
+SERIALIZERS = {'conference': ConferenceSerializer, 'session': SessionSerializer}
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if len(token) > 1 and token not in STOP_WORDS:
+            tokens.append(token[:MAX_TERM_LENGTH])
+    return tokens
+
+
+def _terms_for(kind, instance):
+    """Highest weight per distinct term across the instance's indexed fields."""
+    weights = {}
+    for field, weight in FIELD_WEIGHTS[kind].items():
+        for token in tokenize(getattr(instance, field)):
+            weights[token] = max(weight, weights.get(token, 0))
+    return weights
+
+
+def index_object(kind, instance):
+    SearchTerm.objects.filter(kind=kind, object_id=instance.pk).delete()
+    if instance.is_deleted:
+        return
+    SearchTerm.objects.bulk_create([
+        SearchTerm(term=term, kind=kind, object_id=instance.pk, weight=weight)
+        for term, weight in _terms_for(kind, instance).items()
+    ])
+
+
+def remove_object(kind, pk):
+    SearchTerm.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def rebuild_index(chunk_size=1000):
+    """Drop and rebuild the whole index. Returns the number of objects indexed."""
+    SearchTerm.objects.all().delete()
+    indexed = 0
+    for kind, model in MODELS.items():
+        fields = ['id'] + list(FIELD_WEIGHTS[kind])
+        batch = []
+        for instance in model.objects.filter(is_deleted=False).only(*fields).iterator(chunk_size=chunk_size):
+            batch.extend(
+                SearchTerm(term=term, kind=kind, object_id=instance.pk, weight=weight)
+                for term, weight in _terms_for(kind, instance).items()
+            )
+            indexed += 1
+            if len(batch) >= chunk_size:
+                SearchTerm.objects.bulk_create(batch)
+                batch = []
+        SearchTerm.objects.bulk_create(batch)
+    return indexed
+
+
+def ranked_ids(kind, query):
+    """
+    Queryset of {'object_id', 'score'} for objects of `kind` matching every
+    token of `query` by prefix, best match first.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return SearchTerm.objects.none().values('object_id')
+
+    prefix_match = Q()
+    per_token = {}
+    for i, token in enumerate(tokens):
+        prefix_match |= Q(term__startswith=token)
+        per_token[f'match_{i}'] = Max(Case(When(term__startswith=token, then=Value(1)), default=Value(0), output_field=IntegerField()))
+
+    return (
+        SearchTerm.objects.filter(prefix_match, kind=kind)
+        .values('object_id')
+        .annotate(score=Sum('weight'), **per_token)
+        .filter(**{name: 1 for name in per_token})
+        .order_by('-score', 'object_id')
+        .values('object_id', 'score')
+    )
+
+
+def search(kind, query, limit=10, offset=0):
+    """Return (total, objects) for one page of ranked matches of `kind`."""
+    ranked = ranked_ids(kind, query)
+    total = ranked.count()
+    ids = [row['object_id'] for row in ranked[offset:offset + limit]]
+    queryset = MODELS[kind].objects.filter(pk__in=ids, is_deleted=False)
+    queryset = SERIALIZERS[kind].setup_eager_loading(queryset)
+    objects = queryset.in_bulk()
+    return total, [objects[pk] for pk in ids if pk in objects]
@@ -1,9 +1,69 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Conference, Session, Attendee, Registration
+from .models import Conference, Session, Attendee, Registration, PaymentJob
 from rest_framework.validators import UniqueTogetherValidator
+from core.metrics import TimedSerializerMixin
 
 
-class SessionSerializer(serializers.ModelSerializer):
+def _split_param(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for GET requests: ?fields=a,b limits the output, and fields
+    listed in Meta.expandable_fields are only nested when named in ?expand=
+    (or when neither parameter is sent, which keeps the full representation).
+    """
+
+    @classmethod
+    def selected_fields(cls, request):
+        """Names to render for this request, or None for the full representation."""
+        if request is None or request.method != 'GET':
+            return None
+        fields_param = request.query_params.get('fields')
+        expand_param = request.query_params.get('expand')
+        if fields_param is None and expand_param is None:
+            return None
+
+        available = set(cls.Meta.fields)
+        expandable = set(getattr(cls.Meta, 'expandable_fields', ()))
+        selected = set(_split_param(fields_param)) if fields_param else available - expandable
+        expand = set(_split_param(expand_param or ''))
+        if selected - available:
+            raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(selected - available))}."]})
+        if expand - expandable:
+            raise serializers.ValidationError({'expand': [f"Can only expand: {', '.join(sorted(expandable)) or 'nothing'}."]})
+        return (selected - expandable) | ((selected | expand) & expandable)
+
+    @classmethod
+    def model_columns(cls, names):
+        """Model field paths to load with only() for the given serializer fields."""
+        model = cls.Meta.model
+        columns = {model._meta.pk.name}
+        for name in names:
+            declared = cls._declared_fields.get(name)
+            source = declared.source if declared is not None and declared.source else name
+            if '.' in source:
+                parts = source.split('.')
+                columns.update({parts[0], '__'.join(parts)})
+                continue
+            try:
+                field = model._meta.get_field(source)
+            except Exception:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.add(source)
+        return columns
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(self.context.get('request'))
+        if selected is not None:
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
+
+
+class SessionSerializer(DynamicFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     conference_name = serializers.CharField(source='conference.conference_name', read_only=True)
     conference = serializers.PrimaryKeyRelatedField(
         queryset=Conference.objects.all(),
@@ -14,19 +74,47 @@ class SessionSerializer(serializers.ModelSerializer):
         model = Session
         fields = ['id', 'session_name', 'conference', 'conference_name', 'speaker', 'start_time', 'end_time', 'max_attendees', 'price']
 
-class ConferenceSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        if fields is None or 'conference_name' in fields:
+            queryset = queryset.select_related('conference')
+        return queryset
+
+class ConferenceSerializer(DynamicFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     sessions = SessionSerializer(many=True, read_only=True)
 
     class Meta:
         model = Conference
         fields = ['id', 'conference_name', 'start_date', 'end_date', 'location', 'status', 'description', 'sessions']
+        expandable_fields = ['sessions']
+
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        # Prefetched sessions get their `conference` cache filled, so conference_name costs nothing
+        if fields is None or 'sessions' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('sessions', queryset=Session.objects.filter(is_deleted=False).order_by('start_time', 'id'))
+            )
+        return queryset
+
+    @classmethod
+    def model_columns(cls, names):
+        columns = super().model_columns(names)
+        if 'sessions' in names:
+            # Nested sessions render conference_name from the parent instance
+            columns.add('conference_name')
+        return columns
 
-class AttendeeSerializer(serializers.ModelSerializer):
+class AttendeeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Attendee
         fields = ['id', 'attendee_name', 'email', 'phone_number', 'organization', 'preferences']
 
-class RegistrationSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        return queryset.prefetch_related('preferences')
+
+class RegistrationSerializer(DynamicFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer):
     attendee_name = serializers.CharField(source='attendee.attendee_name', read_only=True)
     session_name = serializers.CharField(source='session.session_name', read_only=True)
     conference = serializers.PrimaryKeyRelatedField(
@@ -47,6 +135,12 @@ class RegistrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'conference', 'session', 'attendee', 'attendee_name', 'session_name', 'registration_date', 'payment_status']
         read_only_fields = ['payment_status', 'registration_date']
 
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        related = [name for field, name in (('attendee_name', 'attendee'), ('session_name', 'session'))
+                   if fields is None or field in fields]
+        return queryset.select_related(*related) if related else queryset
+
 class RegistrationCreateSerializer(serializers.ModelSerializer):
     conference = serializers.PrimaryKeyRelatedField(
         queryset=Conference.objects.all(),
@@ -74,3 +168,25 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         # Additional validation can go here if not covered by model
         return data
+
+class BulkRegistrationSerializer(serializers.Serializer):
+    """Envelope for POST /registrations/bulk/. Items are validated one by one in services.bulk_register."""
+    registrations = serializers.ListField(child=serializers.JSONField(), allow_empty=False, max_length=5000)
+
+class AgendaItemSerializer(serializers.Serializer):
+    session_name = serializers.CharField(required=False, allow_blank=True)
+    start_time = serializers.DateTimeField()
+    end_time = serializers.DateTimeField()
+
+class AgendaCheckSerializer(serializers.Serializer):
+    """Payload for POST /sessions/check-agenda/."""
+    conference = serializers.PrimaryKeyRelatedField(
+        queryset=Conference.objects.filter(is_deleted=False),
+        error_messages={'does_not_exist': 'The selected conference does not exist.'}
+    )
+    sessions = AgendaItemSerializer(many=True, allow_empty=False)
+
+class PaymentJobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = PaymentJob
+        fields = ['id', 'registration', 'status', 'result', 'attempts', 'last_error', 'next_attempt_at', 'created_at', 'updated_at']
@@ -1,7 +1,12 @@
 import random
-from datetime import date
-from django.db.models import Sum
-from .models import Session, Registration, Conference
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from core.cache import invalidate
+from .models import Session, Registration, Conference, ConferenceStats, Attendee, SeatInventory
+from .recommendations import recommended_sessions, refresh_attendees_on_commit
+from .schedule import DisjointIntervals, IntervalIndex, find_conflicts
 
 def check_payment_status():
     """Simulate payment processing."""
@@ -10,81 +15,258 @@ def check_payment_status():
 
 def get_attendee_recommendations(attendee):
     """
-    Suggest sessions based on attendee preferences.
-    If attendee has liked sessions `preferences`, recommend other sessions 
-    in the same conferences that they haven't registered for.
-    """
-    preferred_sessions = attendee.preferences.all()
-    if not preferred_sessions.exists():
-        return []
-
-    # Get conferences of interest
-    conference_ids = preferred_sessions.values_list('conference_id', flat=True)
-    
-    # Get registered session IDs
-    registered_session_ids = Registration.objects.filter(attendee=attendee).values_list('session_id', flat=True)
-
-    # Get list of preferred speakers and session name keywords (simulating topics)
-    preferred_speakers = preferred_sessions.values_list('speaker', flat=True)
-    preferred_keywords = []
-    for name in preferred_sessions.values_list('session_name', flat=True):
-        preferred_keywords.extend(name.split())
-    
-    # Filter generic common words
-    stop_words = {'the', 'a', 'an', 'in', 'on', 'at', 'for', 'to', 'of', 'and', 'session', 'workshop'}
-    preferred_keywords = [k for k in preferred_keywords if k.lower() not in stop_words and len(k) > 3]
-
-    # Find candidates
-    # 1. Same Speaker
-    # 2. Similar Topic (matching keywords in session name)
-    from django.db.models import Q
-    
-    query = Q(speaker__in=preferred_speakers)
-    for keyword in preferred_keywords:
-        query |= Q(session_name__icontains=keyword)
-
-    recommendations = Session.objects.filter(query).filter(
-        conference_id__in=conference_ids,
-        is_deleted=False
-    ).exclude(
-        id__in=registered_session_ids
-    ).exclude(
-        id__in=preferred_sessions.values_list('id', flat=True)
-    ).distinct().order_by('start_time')[:5]
-
-    return recommendations
+    Suggest sessions based on attendee preferences, best match first.
+    Served from the precomputed store kept current by conferences.recommendations.
+    """
+    return recommended_sessions(attendee.pk)
 
 def send_recommendation_email(attendee, recommendations):
     """
-    Simulate sending an email.
-    """
-    if not recommendations:
-        return
-    
-    subject = f"Session Recommendations for {attendee.attendee_name}"
-    body = "Based on your interests, we recommend:\n"
-    for session in recommendations:
-        body += f"- {session.session_name} at {session.start_time}\n"
-    
-    # Store in log or print
-    print(f"--- EMAIL TO {attendee.email} ---\nSubject: {subject}\n{body}\n----------------------------------")
-
-def calculate_conference_revenue(conference_id):
-    registrations = Registration.objects.filter(
-        conference_id=conference_id, 
-        payment_status='Paid'
-    )
-    # Sum of session prices
-    revenue = 0
-    for reg in registrations:
-        revenue += reg.session.price
-    return revenue
+    Queue the recommendation email; delivery happens in the `send_emails` worker.
+    Returns the queued OutboundEmail, or None when there is nothing to recommend.
+    """
+    from .emails import queue_recommendation_email
+    email, _ = queue_recommendation_email(attendee, recommendations)
+    return email
+
+REVENUE_GROUPINGS = {
+    'conference': 'conference_id',
+    'session': 'session_id',
+    'day': 'day',
+    'payment_status': 'payment_status',
+}
+
+def revenue_breakdown(group_by=('conference',), date_from=None, date_to=None, conference_id=None):
+    """
+    Sum of session prices over registrations, computed in SQL.
+    `group_by` is any combination of REVENUE_GROUPINGS keys; the optional date
+    window applies to registration_date. Only paid registrations are summed
+    unless the breakdown is grouped by payment_status.
+    """
+    unknown = set(group_by) - set(REVENUE_GROUPINGS)
+    if unknown:
+        raise ValueError(f"Unknown revenue grouping: {', '.join(sorted(unknown))}")
+
+    registrations = Registration.objects.filter(is_deleted=False)
+    if 'payment_status' not in group_by:
+        registrations = registrations.filter(payment_status='Paid')
+    if conference_id is not None:
+        registrations = registrations.filter(conference_id=conference_id)
+    if date_from:
+        registrations = registrations.filter(registration_date__date__gte=date_from)
+    if date_to:
+        registrations = registrations.filter(registration_date__date__lte=date_to)
+    if 'day' in group_by:
+        registrations = registrations.annotate(day=TruncDate('registration_date'))
+
+    keys = [REVENUE_GROUPINGS[name] for name in group_by]
+    return registrations.values(*keys).annotate(
+        registrations=Count('id'),
+        revenue=Sum('session__price'),
+    ).order_by(*keys)
+
+def calculate_conference_revenue(conference_id, date_from=None, date_to=None):
+    """
+    Paid revenue for a conference. Without a date window this reads the
+    precomputed ConferenceStats row; with one it sums in SQL.
+    """
+    if date_from is None and date_to is None:
+        revenue = ConferenceStats.objects.filter(conference_id=conference_id).values_list('revenue', flat=True).first()
+        return revenue or 0
+    row = revenue_breakdown(date_from=date_from, date_to=date_to, conference_id=conference_id).first()
+    return row['revenue'] if row else 0
 
 def update_conference_statuses():
     """
-    Updates status of all conferences. 
-    Ideally run via Celery or Cron.
+    Moves conferences between Upcoming/Ongoing/Completed by date with three
+    set-based UPDATEs in one transaction. Cancelled and Completed conferences
+    are left alone. Returns the number of rows moved into each status.
+    Ideally run via Cron (`manage.py update_conference_statuses`).
+    """
+    today = timezone.now().date()
+    now = timezone.now()
+    with transaction.atomic():
+        moved = {
+            'Upcoming': Conference.objects.filter(status='Ongoing', start_date__gt=today).update(status='Upcoming', updated_at=now),
+            'Ongoing': Conference.objects.filter(status='Upcoming', start_date__lte=today, end_date__gte=today).update(status='Ongoing', updated_at=now),
+            'Completed': Conference.objects.filter(status__in=['Upcoming', 'Ongoing'], end_date__lt=today).update(status='Completed', updated_at=now),
+        }
+    if any(moved.values()):
+        invalidate('conference')
+    return moved
+
+def _parse_bulk_item(item):
+    """Return ((session_id, attendee_id, conference_id), errors) for one bulk registration item."""
+    if not isinstance(item, dict):
+        return None, ["Each item must be an object with 'session' and 'attendee'."]
+    values = {}
+    errors = []
+    for name in ('session', 'attendee', 'conference'):
+        raw = item.get(name)
+        if raw is None:
+            if name != 'conference':
+                errors.append(f"'{name}' is required.")
+            values[name] = None
+            continue
+        try:
+            values[name] = int(raw)
+        except (TypeError, ValueError):
+            errors.append(f"'{name}' must be an integer.")
+    if errors:
+        return None, errors
+    return (values['session'], values['attendee'], values['conference']), []
+
+def _insert_registrations(accepted):
     """
-    today = date.today()
-    for conf in Conference.objects.exclude(status__in=['Cancelled', 'Completed']):
-        conf.update_status()
+    bulk_create the accepted (result, registration) pairs. If a row collides with
+    one committed by another request, retry row by row and report the collisions
+    as item errors. Returns the pairs that were inserted.
+    """
+    try:
+        with transaction.atomic():
+            Registration.objects.bulk_create([registration for _, registration in accepted], batch_size=500)
+        inserted = accepted
+    except IntegrityError:
+        inserted = []
+        for result, registration in accepted:
+            try:
+                with transaction.atomic():
+                    Registration.objects.bulk_create([registration])
+                inserted.append((result, registration))
+            except IntegrityError:
+                registration.pk = None
+                result.update({"status": "error", "errors": ["This attendee is already registered for the selected session."]})
+    for result, registration in inserted:
+        result.update({"status": "created", "id": registration.pk})
+    return inserted
+
+def bulk_register(items):
+    """
+    Register many (session, attendee) pairs at once. The batch is checked for
+    missing rows, duplicates, attendee schedule overlaps and capacity with a
+    fixed number of queries, and accepted rows are inserted with bulk_create.
+    Returns one result dict per item, in input order.
+    """
+    from . import inventory, stats
+
+    parsed = [_parse_bulk_item(item) for item in items]
+    pairs = [pair for pair, _ in parsed if pair is not None]
+    session_ids = {session_id for session_id, _, _ in pairs}
+    attendee_ids = {attendee_id for _, attendee_id, _ in pairs}
+
+    with transaction.atomic():
+        # Lock the inventory rows first (in a fixed order) so concurrent single/bulk
+        # registrations for these sessions wait for this batch
+        inventory.ensure_inventories(session_ids)
+        seats_left = {
+            session_id: capacity - taken
+            for session_id, capacity, taken in SeatInventory.objects.select_for_update().filter(
+                session_id__in=session_ids).order_by('session_id').values_list('session_id', 'capacity', 'taken')
+        }
+        sessions = Session.objects.filter(pk__in=session_ids, is_deleted=False).only(
+            'id', 'conference_id', 'session_name', 'start_time', 'end_time', 'max_attendees'
+        ).in_bulk()
+        known_attendees = set(Attendee.objects.filter(pk__in=attendee_ids, is_deleted=False).values_list('id', flat=True))
+
+        # Every existing registration of these attendees, read after the locks: duplicates (any
+        # state) and schedules (active ones). A locking read sees rows committed since the
+        # transaction's snapshot, which a plain read would miss under REPEATABLE READ.
+        taken_pairs = set()
+        booked = {}
+        existing = Registration.objects.select_for_update(of=('self',)).filter(attendee_id__in=known_attendees).values_list(
+            'session_id', 'attendee_id', 'is_deleted', 'payment_status', 'session__start_time', 'session__end_time'
+        )
+        for session_id, attendee_id, is_deleted, payment_status, start, end in existing:
+            taken_pairs.add((session_id, attendee_id))
+            if not is_deleted and payment_status != 'Failed':
+                booked.setdefault(attendee_id, []).append((start, end, session_id))
+        schedules = {attendee_id: IntervalIndex(items) for attendee_id, items in booked.items()}
+        # Sessions accepted from this batch, per attendee
+        accepted_times = {}
+
+        results = []
+        accepted = []
+        for index, (pair, errors) in enumerate(parsed):
+            result = {"index": index}
+            if pair is not None:
+                session_id, attendee_id, conference_id = pair
+                session = sessions.get(session_id)
+                if session is None:
+                    errors = ["The selected session does not exist."]
+                elif attendee_id not in known_attendees:
+                    errors = ["The selected attendee does not exist."]
+                elif conference_id is not None and conference_id != session.conference_id:
+                    errors = ["The session does not belong to the selected conference."]
+                elif (session_id, attendee_id) in taken_pairs:
+                    errors = ["This attendee is already registered for the selected session."]
+                elif (attendee_id in schedules and schedules[attendee_id].overlaps(session.start_time, session.end_time)) or (
+                    attendee_id in accepted_times and accepted_times[attendee_id].overlaps(session.start_time, session.end_time)
+                ):
+                    errors = ["Attendee is already registered for an overlapping session."]
+                elif seats_left.get(session_id, 0) <= 0:
+                    errors = [f"Session '{session.session_name}' is full."]
+                else:
+                    taken_pairs.add((session_id, attendee_id))
+                    accepted_times.setdefault(attendee_id, DisjointIntervals()).add(session.start_time, session.end_time)
+                    seats_left[session_id] -= 1
+                    accepted.append((result, Registration(
+                        conference_id=session.conference_id, session_id=session_id, attendee_id=attendee_id
+                    )))
+            if errors:
+                result.update({"status": "error", "errors": errors})
+            results.append(result)
+
+        accepted = _insert_registrations(accepted)
+
+        claimed = {}
+        for _, registration in accepted:
+            claimed[registration.session_id] = claimed.get(registration.session_id, 0) + 1
+        if claimed:
+            SeatInventory.objects.filter(session_id__in=claimed).update(taken=F('taken') + Case(
+                *[When(session_id=session_id, then=Value(count)) for session_id, count in claimed.items()],
+                default=Value(0), output_field=IntegerField(),
+            ))
+            # bulk_create skips the signal handlers, so refresh the touched stats rows directly
+            stats.recompute_session_stats(claimed)
+            stats.recompute_conference_stats({registration.conference_id for _, registration in accepted})
+            refresh_attendees_on_commit({registration.attendee_id for _, registration in accepted})
+            invalidate('registration')
+
+    return results
+
+def check_agenda(conference, agenda):
+    """
+    Report every conflict in an uploaded agenda at once: invalid time ranges,
+    overlaps between agenda items, and overlaps with the conference's existing
+    sessions (loaded with a single query). `agenda` is a list of dicts with
+    start_time/end_time and an optional session_name.
+    """
+    conflicts = []
+    valid = []
+    for index, item in enumerate(agenda):
+        if item['start_time'] >= item['end_time']:
+            conflicts.append({"type": "invalid", "index": index, "message": "End time must be after start time."})
+        else:
+            valid.append((item['start_time'], item['end_time'], index))
+
+    for first, second in find_conflicts(valid):
+        first, second = sorted((first, second))
+        conflicts.append({
+            "type": "agenda", "index": first, "other_index": second,
+            "message": "Agenda items overlap each other."
+        })
+
+    existing = IntervalIndex(
+        (start, end, (session_id, name))
+        for session_id, name, start, end in Session.objects.filter(conference=conference, is_deleted=False)
+        .values_list('id', 'session_name', 'start_time', 'end_time')
+    )
+    for start, end, index in valid:
+        for _, _, (session_id, name) in existing.overlapping(start, end):
+            conflicts.append({
+                "type": "existing", "index": index, "session": session_id, "session_name": name,
+                "message": "Overlaps with an existing session in this conference."
+            })
+
+    conflicts.sort(key=lambda conflict: conflict['index'])
+    return conflicts
@@ -0,0 +1,144 @@
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Conference, Session, Attendee, Registration
+from core.cache import invalidate
+from . import inventory, recommendations, search, stats
+
+
+def _load_snapshot(sender, instance, snapshot):
+    """
+    Fetch the stored state on the first save of an existing row, so stats
+    can be adjusted by delta. Later saves reuse the state post_save leaves.
+    """
+    if instance._state.adding or hasattr(instance, '_stats_snapshot'):
+        return
+    stored = sender.objects.filter(pk=instance.pk).first()
+    instance._stats_snapshot = snapshot(stored) if stored is not None else None
+
+
+@receiver(pre_save, sender=Registration)
+def registration_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _load_snapshot(sender, instance, stats.registration_snapshot)
+
+
+@receiver(post_save, sender=Registration)
+def registration_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._stats_snapshot
+    after = stats.registration_snapshot(instance)
+    if after is None or (before is None and not created):
+        # Partial instance: fall back to recomputing the rows it can touch
+        stored = Registration.objects.get(pk=instance.pk)
+        stats.recompute_session_stats([stored.session_id])
+        stats.recompute_conference_stats([stored.conference_id])
+        after = stats.registration_snapshot(stored)
+    else:
+        stats.apply_registration_change(before, after)
+    if created or before is None or before.session_id != after.session_id:
+        recommendations.refresh_attendees_on_commit([instance.attendee_id])
+    instance._stats_snapshot = after
+
+
+@receiver(post_delete, sender=Registration)
+def registration_post_delete(sender, instance, **kwargs):
+    before = getattr(instance, '_stats_snapshot', None) or stats.registration_snapshot(instance)
+    stats.apply_registration_change(before, None)
+    if inventory.holds_seat(before):
+        inventory.release_seat(before.session_id)
+    recommendations.refresh_attendees_on_commit([instance.attendee_id])
+
+
+@receiver(pre_save, sender=Session)
+def session_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _load_snapshot(sender, instance, stats.session_snapshot)
+
+
+@receiver(post_save, sender=Session)
+def session_post_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._stats_snapshot
+    after = stats.session_snapshot(instance)
+    if after is None or (before is None and not created):
+        stats.recompute_session_stats([instance.pk])
+        stats.recompute_conference_stats([instance.conference_id])
+    else:
+        stats.apply_session_change(before, after, instance.pk)
+    if created:
+        inventory.ensure_inventory(instance)
+    elif before is None or after is None or before.max_attendees != after.max_attendees:
+        inventory.sync_capacity(instance)
+    instance._stats_snapshot = after
+
+
+@receiver(post_delete, sender=Session)
+def session_post_delete(sender, instance, **kwargs):
+    before = getattr(instance, '_stats_snapshot', None) or stats.session_snapshot(instance)
+    stats.apply_session_change(before, None, instance.pk)
+
+
+@receiver(post_save, sender=Conference)
+def conference_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object('conference', instance)
+
+
+@receiver(post_delete, sender=Conference)
+def conference_post_delete(sender, instance, **kwargs):
+    search.remove_object('conference', instance.pk)
+
+
+@receiver(post_save, sender=Session)
+def session_search_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_object('session', instance)
+
+
+@receiver(post_delete, sender=Session)
+def session_search_post_delete(sender, instance, **kwargs):
+    search.remove_object('session', instance.pk)
+
+
+# A session edit can change every attendee's ranking in its conference, so it
+# only queues the conference; `manage.py refresh_recommendations` recomputes it
+@receiver(post_save, sender=Session)
+def session_recommendations_post_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        recommendations.mark_conferences_stale([instance.conference_id])
+
+
+@receiver(post_delete, sender=Session)
+def session_recommendations_post_delete(sender, instance, **kwargs):
+    recommendations.mark_conferences_stale([instance.conference_id])
+
+
+@receiver(m2m_changed, sender=Attendee.preferences.through)
+def preferences_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recommendations.refresh_attendees([instance.pk])
+    elif action == 'pre_clear':
+        instance._cleared_attendee_ids = list(instance.interested_attendees.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        recommendations.refresh_attendees(pk_set)
+    elif action == 'post_clear':
+        recommendations.refresh_attendees(getattr(instance, '_cleared_attendee_ids', []))
+
+
+CACHE_SCOPES = {Conference: 'conference', Session: 'session', Registration: 'registration'}
+
+
+# Connected per model: a sender-less post_delete receiver would turn every
+# queryset.delete() in the project (e.g. log retention) into select-then-delete
+@receiver(post_save, sender=Conference)
+@receiver(post_save, sender=Session)
+@receiver(post_save, sender=Registration)
+@receiver(post_delete, sender=Conference)
+@receiver(post_delete, sender=Session)
+@receiver(post_delete, sender=Registration)
+def invalidate_cached_responses(sender, **kwargs):
+    # Soft deletes are saves, so post_save covers them too
+    invalidate(CACHE_SCOPES[sender])
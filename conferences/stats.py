@@ -0,0 +1,235 @@
+"""
+Incremental maintenance of SessionStats / ConferenceStats.
+
+Registration saves adjust the counters by delta with F() updates; a
+conference's unique_attendees is recounted inside the same UPDATE, since
+concurrent bookings cannot tell which of them is an attendee's first. Session
+and bulk changes fall back to recomputing the affected rows. rebuild_all()
+and check_stats() back the `rebuild_stats` management command.
+"""
+from collections import namedtuple
+from decimal import Decimal
+from django.db import connection
+from django.db.models import Count, F, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from .models import Conference, Session, Registration, SessionStats, ConferenceStats
+
+RegistrationSnapshot = namedtuple('RegistrationSnapshot', ['session_id', 'conference_id', 'attendee_id', 'is_deleted', 'payment_status'])
+SessionSnapshot = namedtuple('SessionSnapshot', ['conference_id', 'is_deleted', 'price', 'max_attendees'])
+
+STATUS_FIELDS = {
+    'Paid': 'paid_registrations',
+    'Pending': 'pending_registrations',
+    'Failed': 'failed_registrations',
+}
+COUNTER_FIELDS = ['total_registrations', 'paid_registrations', 'pending_registrations', 'failed_registrations', 'revenue']
+CONFERENCE_FIELDS = ['session_count', 'unique_attendees'] + COUNTER_FIELDS
+
+
+def registration_snapshot(registration):
+    if registration.get_deferred_fields() & set(RegistrationSnapshot._fields):
+        return None
+    return RegistrationSnapshot(
+        registration.session_id, registration.conference_id, registration.attendee_id,
+        registration.is_deleted, registration.payment_status,
+    )
+
+
+def session_snapshot(session):
+    if session.get_deferred_fields() & set(SessionSnapshot._fields):
+        return None
+    return SessionSnapshot(session.conference_id, session.is_deleted, session.price, session.max_attendees)
+
+
+def _contribution(snapshot, prices):
+    """Counter values a single registration adds to its session/conference rows."""
+    if snapshot is None or snapshot.is_deleted:
+        return {}
+    values = {'total_registrations': 1}
+    if snapshot.payment_status in STATUS_FIELDS:
+        values[STATUS_FIELDS[snapshot.payment_status]] = 1
+    if snapshot.payment_status == 'Paid':
+        values['revenue'] = prices[snapshot.session_id]
+    return values
+
+
+def _merge(target, values, sign):
+    for name, value in values.items():
+        target[name] = target.get(name, 0) + sign * value
+
+
+def _apply(model, key, deltas, create_missing, recount=None):
+    """
+    Add deltas to one stats row, and set any `recount` expressions in the same
+    UPDATE. Missing rows are rebuilt (or skipped during deletes).
+    """
+    values = {name: F(name) + value for name, value in deltas.items() if value}
+    values.update(recount or {})
+    if not values:
+        return
+    updated = model.objects.filter(pk=key).update(**values)
+    if not updated and create_missing:
+        if model is SessionStats:
+            recompute_session_stats([key])
+        else:
+            recompute_conference_stats([key])
+
+
+def _unique_attendees(conference_id):
+    """COUNT(DISTINCT attendee) over the conference's active registrations, as an UPDATE value."""
+    return Coalesce(Subquery(
+        Registration.objects.filter(conference_id=conference_id, is_deleted=False).values('conference_id').annotate(
+            total=Count('attendee_id', distinct=True)
+        ).values('total')
+    ), 0)
+
+
+def apply_registration_change(before, after):
+    """
+    Move one registration's contribution from its `before` snapshot to its
+    `after` snapshot (either may be None for create/delete).
+    """
+    if before == after:
+        return
+    paid = {s.session_id for s in (before, after) if s is not None and not s.is_deleted and s.payment_status == 'Paid'}
+    prices = dict(Session.objects.filter(pk__in=paid).values_list('id', 'price')) if paid else {}
+    old = _contribution(before, prices)
+    new = _contribution(after, prices)
+    create_missing = after is not None
+
+    session_deltas = {}
+    for snapshot, values, sign in ((before, old, -1), (after, new, 1)):
+        if snapshot is not None and values:
+            _merge(session_deltas.setdefault(snapshot.session_id, {}), values, sign)
+    for session_id, deltas in session_deltas.items():
+        _apply(SessionStats, session_id, deltas, create_missing)
+
+    conference_deltas = {}
+    for snapshot, values, sign in ((before, old, -1), (after, new, 1)):
+        if snapshot is not None and values:
+            _merge(conference_deltas.setdefault(snapshot.conference_id, {}), values, sign)
+
+    # unique_attendees can only move when an attendee's active registration appears or
+    # disappears; it is recounted rather than inferred from the other rows, which a
+    # concurrent booking for the same attendee may not have committed yet
+    before_key = (before.attendee_id, before.conference_id) if old else None
+    after_key = (after.attendee_id, after.conference_id) if new else None
+    recount = {key[1] for key in (before_key, after_key) if key} if before_key != after_key else set()
+
+    for conference_id in set(conference_deltas) | recount:
+        _apply(
+            ConferenceStats, conference_id, conference_deltas.get(conference_id, {}), create_missing,
+            recount={'unique_attendees': _unique_attendees(conference_id)} if conference_id in recount else None,
+        )
+
+
+def apply_session_change(before, after, pk):
+    """Keep session_count current and recompute rows whose revenue or conference moved."""
+    if before == after:
+        return
+    if before is None or after is None:
+        snapshot = after or before
+        if not snapshot.is_deleted:
+            _apply(ConferenceStats, snapshot.conference_id, {'session_count': 1 if after else -1}, after is not None)
+        return
+    if before.conference_id != after.conference_id or before.price != after.price:
+        recompute_session_stats([pk])
+        recompute_conference_stats({before.conference_id, after.conference_id})
+    elif before.is_deleted != after.is_deleted:
+        _apply(ConferenceStats, after.conference_id, {'session_count': -1 if after.is_deleted else 1}, True)
+
+
+def _session_rows(session_ids):
+    rows = {session_id: dict.fromkeys(COUNTER_FIELDS, 0) for session_id in session_ids}
+    aggregates = Registration.objects.filter(session_id__in=session_ids, is_deleted=False).values('session_id').annotate(
+        total_registrations=Count('id'),
+        paid_registrations=Count('id', filter=Q(payment_status='Paid')),
+        pending_registrations=Count('id', filter=Q(payment_status='Pending')),
+        failed_registrations=Count('id', filter=Q(payment_status='Failed')),
+        revenue=Sum('session__price', filter=Q(payment_status='Paid')),
+    )
+    for row in aggregates:
+        session_id = row.pop('session_id')
+        rows[session_id] = dict(row, revenue=row['revenue'] or Decimal('0'))
+    return rows
+
+
+def _conference_rows(conference_ids):
+    rows = {conference_id: dict.fromkeys(CONFERENCE_FIELDS, 0) for conference_id in conference_ids}
+    session_counts = Session.objects.filter(conference_id__in=conference_ids, is_deleted=False).values('conference_id').annotate(
+        total=Count('id')
+    ).values_list('conference_id', 'total')
+    for conference_id, total in session_counts:
+        rows[conference_id]['session_count'] = total
+    aggregates = Registration.objects.filter(conference_id__in=conference_ids, is_deleted=False).values('conference_id').annotate(
+        unique_attendees=Count('attendee', distinct=True),
+        total_registrations=Count('id'),
+        paid_registrations=Count('id', filter=Q(payment_status='Paid')),
+        pending_registrations=Count('id', filter=Q(payment_status='Pending')),
+        failed_registrations=Count('id', filter=Q(payment_status='Failed')),
+        revenue=Sum('session__price', filter=Q(payment_status='Paid')),
+    )
+    for row in aggregates:
+        rows[row['conference_id']].update({name: row[name] for name in CONFERENCE_FIELDS if name in row})
+        rows[row['conference_id']]['revenue'] = row['revenue'] or Decimal('0')
+    return rows
+
+
+def _upsert(model, key_field, rows, fields):
+    objs = [model(**{key_field + '_id': key}, **values) for key, values in rows.items()]
+    unique_fields = [key_field] if connection.features.supports_update_conflicts_with_target else None
+    model.objects.bulk_create(objs, update_conflicts=True, unique_fields=unique_fields, update_fields=fields + ['updated_at'])
+
+
+def recompute_session_stats(session_ids):
+    session_ids = list(Session.objects.filter(pk__in=list(session_ids)).values_list('id', flat=True))
+    if session_ids:
+        _upsert(SessionStats, 'session', _session_rows(session_ids), COUNTER_FIELDS)
+
+
+def recompute_conference_stats(conference_ids):
+    conference_ids = list(Conference.objects.filter(pk__in=list(conference_ids)).values_list('id', flat=True))
+    if conference_ids:
+        _upsert(ConferenceStats, 'conference', _conference_rows(conference_ids), CONFERENCE_FIELDS)
+
+
+def _chunks(queryset, size):
+    chunk = []
+    for pk in queryset.values_list('id', flat=True).order_by('id').iterator(chunk_size=size):
+        chunk.append(pk)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild_all(chunk_size=1000):
+    """Recompute every stats row from raw registrations. Returns (sessions, conferences) rebuilt."""
+    sessions = conferences = 0
+    for chunk in _chunks(Session.objects.all(), chunk_size):
+        recompute_session_stats(chunk)
+        sessions += len(chunk)
+    for chunk in _chunks(Conference.objects.all(), chunk_size):
+        recompute_conference_stats(chunk)
+        conferences += len(chunk)
+    return sessions, conferences
+
+
+def check_stats(chunk_size=1000):
+    """Compare stored stats against a fresh recomputation. Returns a list of mismatch descriptions."""
+    problems = []
+    checks = (
+        (Session.objects.all(), SessionStats, _session_rows, COUNTER_FIELDS, 'session'),
+        (Conference.objects.all(), ConferenceStats, _conference_rows, CONFERENCE_FIELDS, 'conference'),
+    )
+    for queryset, model, compute, fields, label in checks:
+        for chunk in _chunks(queryset, chunk_size):
+            stored = {row['pk']: row for row in model.objects.filter(pk__in=chunk).values('pk', *fields)}
+            for key, expected in compute(chunk).items():
+                # A missing row reads as all zeros in the reports
+                actual = stored.get(key) or dict.fromkeys(fields, 0)
+                for name in fields:
+                    if actual[name] != expected[name]:
+                        problems.append(f"{label} {key}: {name} is {actual[name]}, expected {expected[name]}")
+    return problems
@@ -1,3 +1,726 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth.models import User
+from unittest import skipIf
+import csv
+import json
+import tempfile
+from django.test import SimpleTestCase, TestCase, modify_settings, override_settings
+from rest_framework.test import APIClient
+from .models import Conference, Session, Attendee, Registration, SearchTerm
+from .recommendations import TfidfIndex, TopicIndex, np, topic_vector
+from .schedule import DisjointIntervals, IntervalIndex, find_conflicts
+from .search import search
+from .services import calculate_conference_revenue, revenue_breakdown, update_conference_statuses
 
-# Create your tests here.
+
+# The logging middleware's own writes are not part of an endpoint's query plan
+@modify_settings(MIDDLEWARE={'remove': 'core.middleware.RequestLoggingMiddleware'})
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class QueryCountTests(TestCase):
+    """Endpoint query counts must not grow with the number of rows returned."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tester', password='secret')
+        start = date.today() + timedelta(days=30)
+        attendees = [
+            Attendee.objects.create(attendee_name=f"Attendee {i}", email=f"attendee{i}@example.com", phone_number='123')
+            for i in range(3)
+        ]
+        for c in range(3):
+            conference = Conference.objects.create(
+                conference_name=f"Conference {c}", start_date=start, end_date=start + timedelta(days=2), location='Online'
+            )
+            for s in range(3):
+                begins = datetime(start.year, start.month, start.day, 9 + s, tzinfo=dt_timezone.utc)
+                session = Session.objects.create(
+                    conference=conference, session_name=f"Session {c}.{s}", speaker='Speaker',
+                    start_time=begins, end_time=begins + timedelta(minutes=50), max_attendees=10, price=10
+                )
+                attendees[s].preferences.add(session)
+                Registration.objects.create(conference=conference, session=session, attendee=attendees[c])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertQueries(self, url, expected):
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_conference_list(self):
+        # count, conferences, prefetched sessions
+        self.assertQueries('/api/v1/conferences/', 3)
+
+    def test_upcoming_conferences(self):
+        # ETag validators, conferences, prefetched sessions
+        self.assertQueries('/api/v1/conferences/upcoming/', 3)
+
+    def test_conference_detail(self):
+        self.assertQueries(f'/api/v1/conferences/{Conference.objects.first().pk}/', 3)
+
+    def test_session_list(self):
+        self.assertQueries('/api/v1/sessions/', 3)
+
+    def test_not_modified_skips_serialization(self):
+        response = self.client.get('/api/v1/sessions/')
+        with self.assertNumQueries(1):
+            repeat = self.client.get('/api/v1/sessions/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        # Collections carry no Last-Modified: a removed row can leave max(updated_at) where it was
+        self.assertFalse(response.has_header('Last-Modified'))
+
+        # Renaming the conference changes every session's conference_name
+        conference = Conference.objects.first()
+        conference.conference_name = 'Renamed'
+        conference.save()
+        self.assertEqual(self.client.get('/api/v1/sessions/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_if_match_rejects_stale_update(self):
+        session = Session.objects.first()
+        url = f'/api/v1/sessions/{session.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.patch(url, {'speaker': 'First'}, format='json', HTTP_IF_MATCH=etag).status_code, 200)
+        stale = self.client.patch(url, {'speaker': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        session.refresh_from_db()
+        self.assertEqual(session.speaker, 'First')
+
+    def test_detail_last_modified_moves_on_related_soft_delete(self):
+        conference = Conference.objects.first()
+        url = f'/api/v1/conferences/{conference.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        # updated_at has second resolution in Last-Modified; push the deletion past it
+        session = conference.sessions.first()
+        Session.objects.filter(pk=session.pk).update(is_deleted=True, updated_at=session.updated_at + timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 200)
+
+    def test_if_match_is_rechecked_under_lock(self):
+        from unittest import mock
+        from .views import SessionViewSet
+        session = Session.objects.first()
+        url = f'/api/v1/sessions/{session.pk}/'
+        etag = self.client.get(url)['ETag']
+        original = SessionViewSet.get_object
+
+        def get_object_then_race(view):
+            instance = original(view)
+            # Another writer with the same ETag saves after our early check passed
+            Session.objects.filter(pk=session.pk).update(speaker='Other', updated_at=session.updated_at + timedelta(seconds=5))
+            return instance
+
+        with mock.patch.object(SessionViewSet, 'get_object', get_object_then_race):
+            response = self.client.patch(url, {'speaker': 'Mine'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        session.refresh_from_db()
+        self.assertEqual(session.speaker, 'Other')
+
+    def test_attendee_list(self):
+        self.assertQueries('/api/v1/attendees/', 3)
+
+    def test_registration_list(self):
+        # keyset pagination: no COUNT(*)
+        self.assertQueries('/api/v1/registrations/', 1)
+
+    def test_attendee_recommendations(self):
+        from .models import RecommendationRefresh
+        from .recommendations import refresh_stale_conferences
+        # Sessions created after the preferences only queued their conferences
+        self.assertEqual(RecommendationRefresh.objects.count(), 3)
+        self.assertEqual(refresh_stale_conferences(), 3)
+        self.assertFalse(RecommendationRefresh.objects.exists())
+
+        # attendee, stored top-K joined to sessions
+        attendee = Attendee.objects.get(email='attendee0@example.com')
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/attendees/{attendee.pk}/recommendations/')
+        # Same speaker everywhere; own conference is fully registered and preferences are excluded
+        self.assertEqual([row['session_name'] for row in response.data],
+                         ['Session 1.1', 'Session 2.1', 'Session 1.2', 'Session 2.2'])
+
+        attendee.preferences.clear()
+        self.assertEqual(self.client.get(f'/api/v1/attendees/{attendee.pk}/recommendations/').data, [])
+
+    def test_soft_deleted_session_leaves_recommendations_before_refresh(self):
+        from .emails import queue_conference_digests
+        from .models import OutboundEmail, RecommendationRefresh
+        from .recommendations import refresh_stale_conferences
+        refresh_stale_conferences()
+        attendee = Attendee.objects.get(email='attendee0@example.com')
+        session = Session.objects.get(session_name='Session 1.1')
+        newcomer = Attendee.objects.create(attendee_name='Newcomer', email='new@example.com', phone_number='123')
+        newcomer.preferences.add(session.conference.sessions.get(session_name='Session 1.0'))
+        Registration.objects.create(conference=session.conference, session_id=newcomer.preferences.get().pk, attendee=newcomer)
+
+        session.is_deleted = True
+        session.save()
+        # Only queued: the worker has not re-scored anyone yet
+        self.assertTrue(RecommendationRefresh.objects.filter(conference_id=session.conference_id).exists())
+        names = [row['session_name'] for row in self.client.get(f'/api/v1/attendees/{attendee.pk}/recommendations/').data]
+        self.assertEqual(names, ['Session 2.1', 'Session 1.2', 'Session 2.2'])
+        self.assertEqual(queue_conference_digests(session.conference_id), 1)
+        body = OutboundEmail.objects.get(attendee=newcomer).body
+        self.assertIn('Session 1.2', body)
+        self.assertNotIn('Session 1.1', body)
+
+    def test_recommendation_email_is_queued_not_sent(self):
+        from django.core import mail
+        from .emails import send_batch
+        from .models import OutboundEmail
+        attendee = Attendee.objects.get(email='attendee0@example.com')
+        url = f'/api/v1/attendees/{attendee.pk}/recommendations/?email=true'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.get(url)
+        self.assertEqual(OutboundEmail.objects.filter(attendee=attendee).count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(send_batch()['sent'], 1)
+        self.assertEqual(mail.outbox[0].to, [attendee.email])
+        self.assertIn('- Session 1.1 at', mail.outbox[0].body)
+        self.assertEqual(OutboundEmail.objects.get().status, 'Sent')
+
+    def test_conference_digests(self):
+        from .emails import queue_conference_digests
+        conference = Conference.objects.get(conference_name='Conference 1')
+        # attendee1 is registered for every session of conference 1, so nothing is left to recommend
+        self.assertEqual(queue_conference_digests(conference.pk), 0)
+        session = conference.sessions.get(session_name='Session 1.0')
+        newcomer = Attendee.objects.create(attendee_name='Newcomer', email='new@example.com', phone_number='123')
+        newcomer.preferences.add(session)
+        Registration.objects.create(conference=conference, session=session, attendee=newcomer)
+        self.assertEqual(queue_conference_digests(conference.pk), 1)
+        self.assertEqual(queue_conference_digests(conference.pk), 0)
+
+    def test_sparse_conference_list_skips_sessions(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/conferences/?fields=conference_name,start_date')
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'conference_name', 'start_date'})
+
+    def test_sparse_registration_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/registrations/?fields=session_name,payment_status')
+        self.assertEqual(set(response.data['results'][0]), {'session_name', 'payment_status'})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/v1/sessions/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_registration_cursor_walk(self):
+        seen = []
+        url = '/api/v1/registrations/?page_size=4&count=exact'
+        while url:
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            self.assertEqual(response.data['count'], 9)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+
+        previous = self.client.get(response.data['previous'].replace('http://testserver', ''))
+        self.assertEqual([row['id'] for row in previous.data['results']], seen[4:8])
+
+    def test_registration_export_streams_in_chunks(self):
+        # 9 rows in chunks of 4: three keyset queries, no per-row lookups
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/registrations/export/?chunk_size=4')
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len({row['id'] for row in rows}), 9)
+        self.assertEqual(rows[0]['conference_name'], 'Conference 0')
+
+        response = self.client.get('/api/v1/registrations/export/?output=csv&conference=%d' % rows[0]['conference'])
+        lines = list(csv.reader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(lines[0][:3], ['id', 'conference', 'conference_name'])
+        self.assertEqual(len(lines), 4)
+
+    def test_export_rejects_unknown_output(self):
+        response = self.client.get('/api/v1/registrations/export/?output=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'core.middleware.RequestLoggingMiddleware'})
+class RegistrationFlowTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tester', password='secret')
+        start = date.today() + timedelta(days=10)
+        cls.conference = Conference.objects.create(
+            conference_name='Capacity Conf', start_date=start, end_date=start, location='Online'
+        )
+        begins = datetime(start.year, start.month, start.day, 9, tzinfo=dt_timezone.utc)
+        cls.session = Session.objects.create(
+            conference=cls.conference, session_name='Small Room', speaker='Speaker',
+            start_time=begins, end_time=begins + timedelta(hours=1), max_attendees=2
+        )
+        cls.attendees = [
+            Attendee.objects.create(attendee_name=f"Buyer {i}", email=f"buyer{i}@example.com", phone_number='123')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def register(self, attendee):
+        return self.client.post('/api/v1/registrations/', {
+            'conference': self.conference.pk, 'session': self.session.pk, 'attendee': attendee.pk
+        }, format='json')
+
+    def test_full_session_rejects_registration(self):
+        self.assertEqual(self.register(self.attendees[0]).status_code, 201)
+        self.assertEqual(self.register(self.attendees[1]).status_code, 201)
+        response = self.register(self.attendees[2])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.session.seat_inventory.taken, 2)
+
+    def test_failed_payment_releases_seat(self):
+        self.register(self.attendees[0])
+        self.register(self.attendees[1])
+        registration = Registration.objects.get(attendee=self.attendees[0])
+        registration.payment_status = 'Failed'
+        registration.save()
+        self.assertEqual(self.register(self.attendees[2]).status_code, 201)
+        self.session.seat_inventory.refresh_from_db()
+        self.assertEqual(self.session.seat_inventory.taken, 2)
+
+    def test_bulk_registration_respects_capacity(self):
+        items = [{'session': self.session.pk, 'attendee': attendee.pk} for attendee in self.attendees]
+        items.append({'session': self.session.pk, 'attendee': self.attendees[0].pk})
+        response = self.client.post('/api/v1/registrations/bulk/', {'registrations': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'created', 'error', 'error'])
+        self.session.seat_inventory.refresh_from_db()
+        self.assertEqual(self.session.seat_inventory.taken, 2)
+        self.assertEqual(self.session.stats.total_registrations, 2)
+
+    def test_bulk_registration_reports_concurrent_duplicate(self):
+        from unittest import mock
+        from .schedule import DisjointIntervals
+        original_add = DisjointIntervals.add
+
+        def add_then_race(intervals, start, end):
+            # Another request commits the same booking between the checks and the insert
+            Registration.objects.bulk_create([Registration(
+                conference=self.conference, session=self.session, attendee=self.attendees[0]
+            )])
+            original_add(intervals, start, end)
+
+        items = [{'session': self.session.pk, 'attendee': self.attendees[0].pk}]
+        with mock.patch.object(DisjointIntervals, 'add', add_then_race):
+            response = self.client.post('/api/v1/registrations/bulk/', {'registrations': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+        self.session.seat_inventory.refresh_from_db()
+        self.assertEqual(self.session.seat_inventory.taken, 0)
+
+    def test_recommendations_refresh_after_commit(self):
+        from unittest import mock
+        items = [{'session': self.session.pk, 'attendee': self.attendees[1].pk}]
+        with mock.patch('conferences.recommendations.refresh_attendees') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.register(self.attendees[0])
+                self.client.post('/api/v1/registrations/bulk/', {'registrations': items}, format='json')
+                # Not while the seat inventory is locked
+                refresh.assert_not_called()
+        self.assertEqual(refresh.call_args_list, [mock.call({self.attendees[0].pk}), mock.call({self.attendees[1].pk})])
+
+    def test_payment_is_queued_and_processed(self):
+        from .payments import FakeGateway, GatewayError, process_batch
+        self.register(self.attendees[0])
+        registration = Registration.objects.get(attendee=self.attendees[0])
+
+        response = self.client.post('/api/v1/payments/process/', {'registration_id': registration.pk},
+                                    format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(response.status_code, 202)
+        repeat = self.client.post('/api/v1/payments/process/', {'registration_id': registration.pk},
+                                  format='json', HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(repeat.data['job_id'], response.data['job_id'])
+
+        class FlakyGateway(FakeGateway):
+            def charge(self, registration, amount, idempotency_key):
+                raise GatewayError('timeout')
+
+        self.assertEqual(process_batch(gateway=FlakyGateway())['retried'], 1)
+        registration.payment_jobs.update(next_attempt_at=registration.created_at)
+        self.assertEqual(process_batch(gateway=FakeGateway(outcome='Paid'))['Paid'], 1)
+
+        registration.refresh_from_db()
+        self.assertEqual(registration.payment_status, 'Paid')
+        job = self.client.get(f"/api/v1/payments/jobs/{response.data['job_id']}/").data
+        self.assertEqual((job['status'], job['result'], job['attempts']), ('Completed', 'Paid', 2))
+
+    def test_settling_deleted_registration_keeps_inventory(self):
+        from .payments import apply_payment_results
+        self.register(self.attendees[0])
+        self.register(self.attendees[1])
+        registration = Registration.objects.get(attendee=self.attendees[0])
+        registration.is_deleted = True
+        registration.save()
+        other = Registration.objects.get(attendee=self.attendees[1])
+        other.payment_status = 'Failed'
+        other.save()
+
+        # Both were settled elsewhere in the meantime: nothing changes, no seat is released twice
+        self.assertEqual(apply_payment_results({registration.pk: 'Failed', other.pk: 'Failed'}), set())
+        self.session.seat_inventory.refresh_from_db()
+        self.assertEqual(self.session.seat_inventory.taken, 0)
+
+    def test_payment_validates_registration_id(self):
+        response = self.client.post('/api/v1/payments/process/', {'registration_id': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/v1/payments/process/', {'registration_id': 999999}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_concurrent_idempotent_retry_returns_existing_job(self):
+        from unittest import mock
+        from .models import PaymentJob
+        from .payments import enqueue_payment
+        self.register(self.attendees[0])
+        registration = Registration.objects.get(attendee=self.attendees[0])
+        job, _ = enqueue_payment(registration, idempotency_key='order-2')
+        PaymentJob.objects.filter(pk=job.pk).update(status='Completed')
+        # The other retry committed after this one looked the key up
+        with mock.patch.object(PaymentJob.objects, 'filter', return_value=PaymentJob.objects.none()):
+            repeat, created = enqueue_payment(registration, idempotency_key='order-2')
+        self.assertEqual((repeat.pk, created), (job.pk, False))
+
+    def test_reconcile_settles_pending_registrations(self):
+        from .payments import FakeGateway, reconcile_conference
+        for attendee in self.attendees[:2]:
+            self.register(attendee)
+        metrics = reconcile_conference(self.conference.pk, chunk_size=1, gateway=FakeGateway(outcome='Failed'))
+        self.assertEqual((metrics['processed'], metrics['Failed'], metrics['chunks']), (2, 2, 2))
+        self.assertFalse(Registration.objects.filter(payment_status='Pending').exists())
+        self.session.seat_inventory.refresh_from_db()
+        self.assertEqual(self.session.seat_inventory.taken, 0)
+        self.assertEqual(self.session.stats.failed_registrations, 2)
+
+
+class StatsMaintenanceTests(TestCase):
+    """Counters adjusted by delta on save must match a full recomputation."""
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date.today() + timedelta(days=10)
+        cls.conference = Conference.objects.create(
+            conference_name='Stats Conf', start_date=start, end_date=start, location='Online'
+        )
+        cls.sessions = []
+        for i, price in enumerate((20, 30, 40)):
+            begins = datetime(start.year, start.month, start.day, 9 + i, tzinfo=dt_timezone.utc)
+            cls.sessions.append(Session.objects.create(
+                conference=cls.conference, session_name=f"Room {i}", speaker='Speaker',
+                start_time=begins, end_time=begins + timedelta(minutes=50), max_attendees=5, price=price
+            ))
+        attendees = [
+            Attendee.objects.create(attendee_name=f"Counted {i}", email=f"counted{i}@example.com", phone_number='123')
+            for i in range(3)
+        ]
+        for attendee, session in zip(attendees, (cls.sessions[0], cls.sessions[0], cls.sessions[1])):
+            Registration.objects.create(conference=cls.conference, session=session, attendee=attendee)
+
+    def update(self, model, pk, **values):
+        # A fresh load, so the stored state has to be fetched when it is saved
+        instance = model.objects.get(pk=pk)
+        for name, value in values.items():
+            setattr(instance, name, value)
+        instance.save()
+
+    def test_changes_match_recomputation(self):
+        from .models import ConferenceStats, SessionStats
+        from .stats import check_stats
+        first, second, third = Registration.objects.order_by('pk').values_list('pk', flat=True)
+        self.update(Registration, first, payment_status='Paid')
+        self.update(Registration, second, payment_status='Failed')
+        self.update(Registration, first, session=self.sessions[1])
+        self.update(Registration, second, is_deleted=True)
+        self.update(Registration, third, payment_status='Paid')
+        self.update(Session, self.sessions[2].pk, is_deleted=True)
+
+        self.assertEqual(check_stats(), [])
+        moved_to = SessionStats.objects.get(session=self.sessions[1])
+        self.assertEqual((moved_to.total_registrations, moved_to.paid_registrations, moved_to.revenue), (2, 2, 60))
+        left = SessionStats.objects.get(session=self.sessions[0])
+        self.assertEqual((left.total_registrations, left.failed_registrations), (0, 0))
+        totals = ConferenceStats.objects.get(conference=self.conference)
+        self.assertEqual(
+            (totals.session_count, totals.unique_attendees, totals.total_registrations, totals.revenue), (2, 2, 2, 60)
+        )
+
+    def test_unique_attendees_is_recounted(self):
+        from .models import ConferenceStats
+        attendee = Attendee.objects.create(attendee_name='Racer', email='racer@example.com', phone_number='123')
+        # A concurrent booking for the same attendee that this transaction's counters never saw
+        Registration.objects.bulk_create([
+            Registration(conference=self.conference, session=self.sessions[1], attendee=attendee)
+        ])
+        registration = Registration.objects.create(conference=self.conference, session=self.sessions[2], attendee=attendee)
+        self.assertEqual(ConferenceStats.objects.get(conference=self.conference).unique_attendees, 4)
+        registration.is_deleted = True
+        registration.save()
+        self.assertEqual(ConferenceStats.objects.get(conference=self.conference).unique_attendees, 4)
+        Registration.objects.filter(attendee=attendee).delete()
+        self.assertEqual(ConferenceStats.objects.get(conference=self.conference).unique_attendees, 3)
+
+
+class RevenueBreakdownTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        start = date.today() + timedelta(days=10)
+        begins = datetime(start.year, start.month, start.day, 9, tzinfo=dt_timezone.utc)
+        cls.days = [date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3)]
+        cls.conferences = [
+            Conference.objects.create(conference_name=name, start_date=start, end_date=start, location='Online')
+            for name in ('Alpha', 'Beta')
+        ]
+        cls.sessions = []
+        for i, (conference, price) in enumerate([(cls.conferences[0], 20), (cls.conferences[0], 50), (cls.conferences[1], 100)]):
+            cls.sessions.append(Session.objects.create(
+                conference=conference, session_name=f"Room {price}", speaker='Speaker',
+                start_time=begins + timedelta(hours=i), end_time=begins + timedelta(hours=i, minutes=50),
+                max_attendees=10, price=price
+            ))
+        rows = [(0, 'Paid', 0), (0, 'Pending', 0), (1, 'Paid', 1), (2, 'Paid', 1), (2, 'Failed', 2), (0, 'Paid', 0)]
+        for i, (session_index, payment_status, day_index) in enumerate(rows):
+            session = cls.sessions[session_index]
+            attendee = Attendee.objects.create(attendee_name=f"Payer {i}", email=f"payer{i}@example.com", phone_number='123')
+            registration = Registration.objects.create(
+                conference=session.conference, session=session, attendee=attendee, payment_status=payment_status
+            )
+            day = cls.days[day_index]
+            Registration.objects.filter(pk=registration.pk).update(
+                registration_date=datetime(day.year, day.month, day.day, 12, tzinfo=dt_timezone.utc)
+            )
+        # Soft-deleted registrations never count
+        registration.is_deleted = True
+        registration.save()
+
+    def breakdown(self, *keys, **kwargs):
+        return [tuple(row[key] for key in keys) + (row['registrations'], row['revenue'])
+                for row in revenue_breakdown(**kwargs)]
+
+    def test_groupings(self):
+        alpha, beta = (conference.pk for conference in self.conferences)
+        self.assertEqual(self.breakdown('conference_id'), [(alpha, 2, 70), (beta, 1, 100)])
+        self.assertEqual(
+            self.breakdown('session_id', group_by=['session']),
+            [(session.pk, 1, price) for session, price in zip(self.sessions, (20, 50, 100))]
+        )
+        # Grouping by status is the one breakdown that includes unpaid registrations
+        self.assertEqual(
+            self.breakdown('payment_status', group_by=['payment_status']),
+            [('Failed', 1, 100), ('Paid', 3, 170), ('Pending', 1, 20)]
+        )
+        self.assertEqual(
+            self.breakdown('conference_id', 'day', group_by=['conference', 'day']),
+            [(alpha, self.days[0], 1, 20), (alpha, self.days[1], 1, 50), (beta, self.days[1], 1, 100)]
+        )
+
+    def test_date_window_is_inclusive(self):
+        alpha, beta = (conference.pk for conference in self.conferences)
+        self.assertEqual(
+            self.breakdown('conference_id', date_from=self.days[1], date_to=self.days[1]), [(alpha, 1, 50), (beta, 1, 100)]
+        )
+        self.assertEqual(self.breakdown('conference_id', date_to=self.days[0]), [(alpha, 1, 20)])
+        self.assertEqual(self.breakdown('conference_id', date_from=self.days[1], conference_id=alpha), [(alpha, 1, 50)])
+        self.assertEqual(calculate_conference_revenue(alpha, date_from=self.days[2]), 0)
+
+    def test_unknown_grouping_is_rejected(self):
+        with self.assertRaises(ValueError):
+            revenue_breakdown(group_by=['attendee'])
+
+
+class ConferenceStatusTests(TestCase):
+
+    def conference(self, name, status, starts_in, ends_in):
+        today = date.today()
+        return Conference.objects.create(
+            conference_name=name, status=status, location='Online',
+            start_date=today + timedelta(days=starts_in), end_date=today + timedelta(days=ends_in)
+        )
+
+    def test_transitions_by_date(self):
+        started = self.conference('Started', 'Upcoming', -1, 1)
+        missed = self.conference('Missed', 'Upcoming', -3, -2)
+        finished = self.conference('Finished', 'Ongoing', -3, -1)
+        postponed = self.conference('Postponed', 'Ongoing', 5, 6)
+        cancelled = self.conference('Cancelled', 'Cancelled', -3, -1)
+        ahead = self.conference('Ahead', 'Upcoming', 5, 6)
+
+        self.assertEqual(update_conference_statuses(), {'Upcoming': 1, 'Ongoing': 1, 'Completed': 2})
+        statuses = dict(Conference.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[conference.pk] for conference in (started, missed, finished, postponed, cancelled, ahead)],
+            ['Ongoing', 'Completed', 'Completed', 'Upcoming', 'Cancelled', 'Upcoming']
+        )
+        self.assertEqual(update_conference_statuses(), {'Upcoming': 0, 'Ongoing': 0, 'Completed': 0})
+
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tester', password='secret')
+        start = date.today() + timedelta(days=10)
+        cls.conference = Conference.objects.create(
+            conference_name='Market Trends', start_date=start, end_date=start, location='Berlin'
+        )
+        begins = datetime(start.year, start.month, start.day, 9, tzinfo=dt_timezone.utc)
+        cls.session = Session.objects.create(
+            conference=cls.conference, session_name='Pricing Workshop', speaker='Mark Jones',
+            start_time=begins, end_time=begins + timedelta(hours=1), max_attendees=10
+        )
+
+    def terms(self, kind, pk):
+        return dict(SearchTerm.objects.filter(kind=kind, object_id=pk).values_list('term', 'weight'))
+
+    def test_save_indexes_fields_by_weight(self):
+        self.assertEqual(self.terms('conference', self.conference.pk), {'market': 3, 'trends': 3, 'berlin': 1})
+        self.assertEqual(self.terms('session', self.session.pk), {'pricing': 3, 'workshop': 3, 'mark': 2, 'jones': 2})
+        self.session.session_name = 'Market Sizing'
+        self.session.save()
+        self.assertEqual(self.terms('session', self.session.pk), {'market': 3, 'sizing': 3, 'mark': 2, 'jones': 2})
+        self.assertEqual(search('session', 'mark')[0], 1)
+
+    def test_delete_removes_terms(self):
+        self.session.is_deleted = True
+        self.session.save()
+        self.assertEqual(self.terms('session', self.session.pk), {})
+        pk = self.conference.pk
+        self.conference.delete()
+        self.assertEqual(self.terms('conference', pk), {})
+        self.assertEqual(search('conference', 'market'), (0, []))
+
+    def test_empty_query_keeps_response_shape(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(client.get('/api/v1/search/', {'q': 'market'}).data['totals'], {'conferences': 1, 'sessions': 0})
+        response = client.get('/api/v1/search/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'totals': {'conferences': 0, 'sessions': 0}, 'conferences': [], 'sessions': []})
+
+
+@modify_settings(MIDDLEWARE={'remove': 'core.middleware.RequestLoggingMiddleware'})
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()}},
+    RESPONSE_CACHE={'ALIAS': 'default', 'KEY_PREFIX': 'test-response'},
+)
+class ResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tester', password='secret')
+        start = date.today() + timedelta(days=5)
+        cls.conference = Conference.objects.create(
+            conference_name='Cached Conf', start_date=start, end_date=start, location='Online'
+        )
+        begins = datetime(start.year, start.month, start.day, 9, tzinfo=dt_timezone.utc)
+        cls.session = Session.objects.create(
+            conference=cls.conference, session_name='Cached Talk', speaker='Speaker',
+            start_time=begins, end_time=begins + timedelta(hours=1), max_attendees=5
+        )
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_hit_after_miss(self):
+        first = self.client.get('/api/v1/sessions/?page=1')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/sessions/?page=1')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_not_modified_from_cache(self):
+        etag = self.client.get('/api/v1/sessions/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/sessions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache']), (304, 'HIT'))
+
+    def test_save_invalidates(self):
+        self.client.get('/api/v1/conferences/upcoming/')
+        self.session.session_name = 'Renamed Talk'
+        self.session.save()
+        response = self.client.get('/api/v1/conferences/upcoming/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['sessions'][0]['session_name'], 'Renamed Talk')
+
+    def test_streamed_report_is_cached(self):
+        first = self.client.get('/api/v1/reports/conferences/')
+        body = b''.join(first.streaming_content)
+        second = self.client.get('/api/v1/reports/conferences/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, body)
+
+    def test_keys_are_per_user(self):
+        self.client.get('/api/v1/sessions/')
+        other = User.objects.create_user(username='other', password='secret')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/v1/sessions/')['X-Cache'], 'MISS')
+
+
+class ScheduleTests(SimpleTestCase):
+
+    def test_interval_index_matches_brute_force(self):
+        items = [(start, start + length, i) for i, (start, length) in enumerate(
+            [(0, 10), (5, 3), (12, 4), (15, 10), (30, 1), (2, 40), (26, 4)]
+        )]
+        index = IntervalIndex(items)
+        for start, end in [(0, 1), (8, 13), (16, 17), (25, 26), (31, 50), (45, 50)]:
+            expected = {i for s, e, i in items if s < end and e > start}
+            self.assertEqual({i for _, _, i in index.overlapping(start, end)}, expected)
+
+    def test_disjoint_intervals_check_neighbours(self):
+        intervals = DisjointIntervals()
+        intervals.add(10, 20)
+        intervals.add(30, 40)
+        checks = [(0, 10), (0, 11), (20, 30), (19, 21), (25, 35), (40, 50), (10, 20), (5, 45)]
+        self.assertEqual([intervals.overlaps(*check) for check in checks],
+                         [False, True, False, True, True, False, True, True])
+
+    def test_touching_intervals_do_not_conflict(self):
+        self.assertEqual(find_conflicts([(0, 5, 'a'), (5, 9, 'b'), (8, 10, 'c')]), [('b', 'c')])
+
+
+class RecommendationScorerTests(SimpleTestCase):
+    sessions = [
+        (1, 1, 'Python Performance', 'Ada', datetime(2026, 1, 1, 9)),
+        (2, 1, 'Python Packaging', 'Grace', datetime(2026, 1, 1, 10)),
+        (3, 1, 'Scaling Databases', 'Ada', datetime(2026, 1, 1, 11)),
+        (4, 1, 'Design Systems', 'Linus', datetime(2026, 1, 1, 12)),
+        (5, 2, 'Python Performance', 'Ada', datetime(2026, 1, 1, 9)),
+    ]
+
+    def rank(self, index_class):
+        preferred = [(1, topic_vector('Python Performance', 'Ada'))]
+        return index_class(self.sessions).rank([(7, preferred, {1}, {1})], k=5)[7]
+
+    def test_overlap_scorer(self):
+        # Other conferences, unrelated and excluded sessions never appear
+        self.assertEqual([session_id for session_id, _ in self.rank(TopicIndex)], [3, 2])
+
+    @skipIf(np is None, 'NumPy is not installed')
+    def test_tfidf_scorer_ranks_same_candidates(self):
+        ranked = self.rank(TfidfIndex)
+        self.assertEqual({session_id for session_id, _ in ranked}, {2, 3})
+        self.assertTrue(all(0 < score <= 1 for _, score in ranked))
+
+    @skipIf(np is None, 'NumPy is not installed')
+    def test_tfidf_index_stores_only_nonzero_weights(self):
+        index = TfidfIndex(self.sessions)
+        self.assertEqual(len(index.row_weights), sum(len(topic_vector(row[2], row[3])) for row in self.sessions))
+        # Rows stay unit length
+        norms = np.bincount(np.repeat(np.arange(len(self.sessions)), np.diff(index.row_ptr)), index.row_weights ** 2)
+        self.assertTrue(np.allclose(norms, 1))
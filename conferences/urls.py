@@ -1,8 +1,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (ConferenceViewSet, RegistrationViewSet, SessionViewSet, AttendeeViewSet,
-                    PaymentProcessView, SearchAPIView, AttendeeRecommendationView, 
-                    ConferenceReportView, SessionReportView)
+                    PaymentProcessView, PaymentJobView, PaymentReconcileView, SearchAPIView, AttendeeRecommendationView, 
+                    ConferenceReportView, SessionReportView, RevenueReportView)
 
 router = DefaultRouter()
 router.register(r'conferences', ConferenceViewSet, basename='conference')
@@ -13,8 +13,11 @@ router.register(r'registrations', RegistrationViewSet, basename='registration')
 urlpatterns = [
     path('', include(router.urls)),
     path('payments/process/', PaymentProcessView.as_view(), name='payment-process'),
+    path('payments/jobs/<int:pk>/', PaymentJobView.as_view(), name='payment-job'),
+    path('payments/reconcile/', PaymentReconcileView.as_view(), name='payment-reconcile'),
     path('search/', SearchAPIView.as_view(), name='search'),
     path('attendees/<int:pk>/recommendations/', AttendeeRecommendationView.as_view(), name='attendee-recommendations'),
     path('reports/conferences/', ConferenceReportView.as_view(), name='report-conferences'),
     path('reports/sessions/', SessionReportView.as_view(), name='report-sessions'),
+    path('reports/revenue/', RevenueReportView.as_view(), name='report-revenue'),
 ]
@@ -1,21 +1,92 @@
 from rest_framework import viewsets, status, views, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Count, F
+from rest_framework.exceptions import ValidationError
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.urls import reverse
 from django.utils import timezone
-from .models import Conference, Session, Attendee, Registration
+from .models import Conference, Session, Attendee, Registration, PaymentJob
 from .serializers import (ConferenceSerializer, SessionSerializer, 
-                          AttendeeSerializer, RegistrationSerializer, RegistrationCreateSerializer)
-from .services import check_payment_status, get_attendee_recommendations, send_recommendation_email
+                          AttendeeSerializer, RegistrationSerializer, RegistrationCreateSerializer,
+                          BulkRegistrationSerializer, AgendaCheckSerializer, PaymentJobSerializer)
+from core.cache import cache_response
+from core.conditional import ConditionalUpdateMixin, conditional_response
+from core.exports import export_response
+from core.pagination import KeysetPagination
+from core.renderers import stream_json_envelope
+from .payments import enqueue_payment, reconcile_conference
+from .search import search
+from .services import (get_attendee_recommendations, send_recommendation_email,
+                       revenue_breakdown, REVENUE_GROUPINGS, bulk_register, check_agenda)
 
-class ConferenceViewSet(viewsets.ModelViewSet):
+def parse_date_param(request, name):
+    """Read an optional YYYY-MM-DD query parameter, rejecting malformed values."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: ["Enter a valid date in YYYY-MM-DD format."]})
+    return parsed
+
+def parse_id_param(request, name):
+    """Read an optional integer id query parameter."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: ["A valid integer is required."]})
+    return int(value)
+
+class EagerLoadingMixin:
+    """
+    Applies the serializer's setup_eager_loading() so nested/related fields don't cost a query per row.
+    With sparse fieldsets (?fields= / ?expand=) only the columns behind the selected fields are loaded.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        fields = None
+        if hasattr(serializer_class, 'selected_fields'):
+            fields = serializer_class.selected_fields(self.request)
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset, fields)
+        if fields is not None:
+            columns = serializer_class.model_columns(fields)
+            # Keyset pagination reads its ordering columns to build cursors
+            columns.update(name.lstrip('-') for name in getattr(self.pagination_class, 'ordering', ()))
+            queryset = queryset.only(*columns)
+        return queryset
+
+class ConferenceViewSet(ConditionalUpdateMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Conference.objects.filter(is_deleted=False)
     serializer_class = ConferenceSerializer
+    # Nested sessions are part of the payload
+    conditional_related = [('sessions', Q(sessions__is_deleted=False))]
+
+    @cache_response('conference', 'session')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response('conference', 'session')
+    @conditional_response(lambda view: view.get_queryset().filter(pk=view.kwargs['pk']))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_upcoming_queryset(self):
+        return self.get_queryset().filter(start_date__gt=timezone.now().date())
 
     @action(detail=False, methods=['get'])
+    @cache_response('conference', 'session')
+    @conditional_response(lambda view: view.get_upcoming_queryset())
     def upcoming(self, request):
-        today = timezone.now().date()
-        upcoming = Conference.objects.filter(start_date__gt=today, is_deleted=False)
+        upcoming = self.get_upcoming_queryset()
         serializer = self.get_serializer(upcoming, many=True)
         return Response(serializer.data)
     
@@ -25,9 +96,32 @@ class ConferenceViewSet(viewsets.ModelViewSet):
         instance.deleted_at = timezone.now()
         instance.save()
 
-class SessionViewSet(viewsets.ModelViewSet):
+class SessionViewSet(ConditionalUpdateMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Session.objects.filter(is_deleted=False)
     serializer_class = SessionSerializer
+    # conference_name comes from the conference row
+    conditional_related = [('conference', None)]
+
+    @cache_response('session', 'conference')
+    @conditional_response(lambda view: view.filter_queryset(view.get_queryset()))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response('session', 'conference')
+    @conditional_response(lambda view: view.get_queryset().filter(pk=view.kwargs['pk']))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'], url_path='check-agenda')
+    def check_agenda(self, request):
+        """
+        Check a whole agenda against itself and the conference's existing sessions.
+        Payload: {"conference": 1, "sessions": [{"session_name": "...", "start_time": "...", "end_time": "..."}]}
+        """
+        serializer = AgendaCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        conflicts = check_agenda(serializer.validated_data['conference'], serializer.validated_data['sessions'])
+        return Response({"valid": not conflicts, "conflicts": conflicts})
     
     def perform_destroy(self, instance):
         # Soft delete
@@ -35,19 +129,43 @@ class SessionViewSet(viewsets.ModelViewSet):
         instance.deleted_at = timezone.now()
         instance.save()
 
-class AttendeeViewSet(viewsets.ModelViewSet):
+ATTENDEE_EXPORT_COLUMNS = [
+    ('id', 'id'), ('attendee_name', 'attendee_name'), ('email', 'email'),
+    ('phone_number', 'phone_number'), ('organization', 'organization'), ('created_at', 'created_at'),
+]
+
+REGISTRATION_EXPORT_COLUMNS = [
+    ('id', 'id'), ('conference', 'conference_id'), ('conference_name', 'conference__conference_name'),
+    ('session', 'session_id'), ('session_name', 'session__session_name'),
+    ('attendee', 'attendee_id'), ('attendee_name', 'attendee__attendee_name'), ('attendee_email', 'attendee__email'),
+    ('payment_status', 'payment_status'), ('registration_date', 'registration_date'), ('is_deleted', 'is_deleted'),
+]
+
+class AttendeeViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     # Added AttendeeViewSet just in case, good for management
     queryset = Attendee.objects.filter(is_deleted=False)
     serializer_class = AttendeeSerializer
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream attendees as NDJSON (default) or ?output=csv. ?conference=<id> limits to its registrants."""
+        queryset = Attendee.objects.filter(is_deleted=False)
+        conference_id = parse_id_param(request, 'conference')
+        if conference_id:
+            queryset = queryset.filter(pk__in=Registration.objects.filter(
+                conference_id=conference_id, is_deleted=False
+            ).values('attendee_id'))
+        return export_response(request, queryset, ATTENDEE_EXPORT_COLUMNS, 'attendees')
     
     def perform_destroy(self, instance):
         instance.is_deleted = True
         instance.deleted_at = timezone.now()
         instance.save()
 
-class RegistrationViewSet(viewsets.ModelViewSet):
+class RegistrationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     queryset = Registration.objects.all()
     serializer_class = RegistrationSerializer
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -63,59 +181,126 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         headers = self.get_success_headers(serializer.data)
         return Response(RegistrationSerializer(registration).data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Register many attendees at once.
+        Payload: {"registrations": [{"session": 1, "attendee": 2}, ...]} (optional "conference" per item)
+        """
+        serializer = BulkRegistrationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = bulk_register(serializer.validated_data['registrations'])
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream registrations as NDJSON (default) or ?output=csv.
+        Filters: ?conference=<id>, ?session=<id>, ?attendee=<id>, ?payment_status=.
+        """
+        queryset = Registration.objects.all()
+        for name in ('conference', 'session', 'attendee'):
+            value = parse_id_param(request, name)
+            if value:
+                queryset = queryset.filter(**{f'{name}_id': value})
+        payment_status = request.query_params.get('payment_status')
+        if payment_status:
+            if payment_status not in dict(Registration.PAYMENT_STATUS_CHOICES):
+                raise ValidationError({'payment_status': [f"Choose from: {', '.join(dict(Registration.PAYMENT_STATUS_CHOICES))}."]})
+            queryset = queryset.filter(payment_status=payment_status)
+        return export_response(request, queryset, REGISTRATION_EXPORT_COLUMNS, 'registrations')
+
 class PaymentProcessView(views.APIView):
     def post(self, request):
         """
-        Mock payment processing.
-        Payload: {"registration_id": 1}
+        Queue a payment; a worker (`manage.py process_payments`) charges it.
+        Payload: {"registration_id": 1}. An optional Idempotency-Key header
+        (or "idempotency_key" field) makes retries of this call safe.
+        Returns 202 with the job and a status URL to poll.
         """
         reg_id = request.data.get('registration_id')
+        if isinstance(reg_id, bool) or not str(reg_id).isdigit():
+            return Response({"error": "registration_id must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            registration = Registration.objects.get(pk=reg_id)
+            registration = Registration.objects.get(pk=int(reg_id))
             if registration.payment_status == 'Paid':
                 return Response({"message": "Already paid"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            payment_status = check_payment_status()
-            registration.payment_status = payment_status
-            registration.save()
-            return Response({"status": payment_status, "registration_id": reg_id})
+
+            idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+            job, created = enqueue_payment(registration, idempotency_key=idempotency_key)
+            return Response({
+                "job_id": job.pk,
+                "status": job.status,
+                "registration_id": registration.pk,
+                "status_url": request.build_absolute_uri(reverse('payment-job', args=[job.pk]))
+            }, status=status.HTTP_202_ACCEPTED)
         except Registration.DoesNotExist:
             return Response({"error": "Registration not found"}, status=status.HTTP_404_NOT_FOUND)
 
+class PaymentReconcileView(views.APIView):
+    def post(self, request):
+        """
+        Charge every Pending registration of a conference and return throughput metrics.
+        Payload: {"conference": 1}. Use `manage.py reconcile_payments` for very large backlogs.
+        """
+        conference_id = request.data.get('conference')
+        if not Conference.objects.filter(pk=conference_id if str(conference_id).isdigit() else None).exists():
+            return Response({"error": "Conference not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(reconcile_conference(int(conference_id)))
+
+class PaymentJobView(generics.RetrieveAPIView):
+    queryset = PaymentJob.objects.all()
+    serializer_class = PaymentJobSerializer
+
 class SearchAPIView(views.APIView):
+    """
+    Ranked prefix search over conferences and sessions using the SearchTerm index.
+    ?q=<text>, optional ?type=conferences|sessions, ?limit=<per type, max 50>, ?page=<n>.
+    """
+    SEARCH_TYPES = {
+        'conferences': ('conference', ConferenceSerializer),
+        'sessions': ('session', SessionSerializer),
+    }
+    DEFAULT_LIMIT = 10
+    MAX_LIMIT = 50
+
     def get(self, request):
         query = request.query_params.get('q', '')
-        if not query:
-             return Response({
-            "conferences": [],
-            "sessions": []
-        })
+        search_type = request.query_params.get('type')
+        if search_type and search_type not in self.SEARCH_TYPES:
+            raise ValidationError({'type': [f"Choose from: {', '.join(self.SEARCH_TYPES)}."]})
+        try:
+            limit = min(int(request.query_params.get('limit', self.DEFAULT_LIMIT)), self.MAX_LIMIT)
+            page = int(request.query_params.get('page', 1))
+        except ValueError:
+            raise ValidationError({'detail': "limit and page must be integers."})
+        if limit < 1 or page < 1:
+            raise ValidationError({'detail': "limit and page must be positive."})
 
-        from django.db.models import Q
-        
-        conferences = Conference.objects.filter(
-            Q(conference_name__icontains=query) | Q(description__icontains=query),
-            is_deleted=False
-        )
-        
-        sessions = Session.objects.filter(
-            Q(session_name__icontains=query) | Q(speaker__icontains=query),
-            is_deleted=False
-        )
-        
-        return Response({
-            "conferences": ConferenceSerializer(conferences, many=True).data,
-            "sessions": SessionSerializer(sessions, many=True).data
-        })
+        data = {"totals": {}}
+        for name, (kind, serializer_class) in self.SEARCH_TYPES.items():
+            if search_type and name != search_type:
+                continue
+            # An empty query matches nothing but keeps the response shape
+            total, results = search(kind, query, limit=limit, offset=(page - 1) * limit) if query else (0, [])
+            data[name] = serializer_class(results, many=True).data
+            data["totals"][name] = total
+        return Response(data)
 
 class AttendeeRecommendationView(views.APIView):
     def get(self, request, pk):
         try:
             attendee = Attendee.objects.get(pk=pk, is_deleted=False)
-            recommendations = get_attendee_recommendations(attendee)
+            recommendations = list(get_attendee_recommendations(attendee))
             send_email = request.query_params.get('email', 'false').lower() == 'true'
             
             if send_email:
+                # Only queued here; the send_emails worker delivers it
                 send_recommendation_email(attendee, recommendations)
                 
             return Response(SessionSerializer(recommendations, many=True).data)
@@ -124,31 +309,109 @@ class AttendeeRecommendationView(views.APIView):
 
 # Reports
 class ConferenceReportView(views.APIView):
+    """
+    Per-conference sessions, unique attendees, payment breakdown and revenue.
+    Reads the precomputed ConferenceStats rows and streams them as they are read.
+    """
+
+    @cache_response('conference', 'session', 'registration')
     def get(self, request):
-        data = []
-        for conf in Conference.objects.filter(is_deleted=False):
-            unique_attendees = Registration.objects.filter(conference=conf).values('attendee').distinct().count()
-            data.append({
-                "conference": conf.conference_name,
-                "sessions": conf.sessions.filter(is_deleted=False).count(),
-                "unique_attendees": unique_attendees
-            })
-        return Response(data)
+        def rows():
+            conferences = Conference.objects.filter(is_deleted=False).order_by('id').values_list(
+                'id', 'conference_name', 'stats__session_count', 'stats__unique_attendees',
+                'stats__paid_registrations', 'stats__pending_registrations',
+                'stats__failed_registrations', 'stats__revenue',
+            )
+            for conf_id, name, sessions, unique_attendees, paid, pending, failed, revenue in conferences.iterator(chunk_size=2000):
+                yield {
+                    "id": conf_id,
+                    "conference": name,
+                    "sessions": sessions or 0,
+                    "unique_attendees": unique_attendees or 0,
+                    "paid_registrations": paid or 0,
+                    "pending_registrations": pending or 0,
+                    "failed_registrations": failed or 0,
+                    "revenue": revenue or 0
+                }
+
+        return StreamingHttpResponse(stream_json_envelope(rows()), content_type='application/json')
+
+class SessionReportView(generics.GenericAPIView):
+    """
+    Per-session registrations, capacity and revenue, read from SessionStats in a single query.
+    Filters: ?conference=<id>, ?date_from=YYYY-MM-DD, ?date_to=YYYY-MM-DD (session start date).
+    """
 
-class SessionReportView(views.APIView):
+    def get_queryset(self):
+        queryset = Session.objects.filter(is_deleted=False)
+
+        conference_id = self.request.query_params.get('conference')
+        if conference_id:
+            if not conference_id.isdigit():
+                raise ValidationError({'conference': ["A valid integer is required."]})
+            queryset = queryset.filter(conference_id=conference_id)
+        date_from = parse_date_param(self.request, 'date_from')
+        if date_from:
+            queryset = queryset.filter(start_time__date__gte=date_from)
+        date_to = parse_date_param(self.request, 'date_to')
+        if date_to:
+            queryset = queryset.filter(start_time__date__lte=date_to)
+
+        return queryset.annotate(
+            total_registrations=F('stats__total_registrations'),
+            paid_registrations=F('stats__paid_registrations'),
+            revenue=F('stats__revenue'),
+        ).values(
+            'id', 'session_name', 'conference_id', 'max_attendees',
+            'total_registrations', 'paid_registrations', 'revenue',
+        ).order_by('start_time', 'id')
+
+    @cache_response('session', 'conference', 'registration')
     def get(self, request):
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+
         data = []
-        for session in Session.objects.filter(is_deleted=False):
-            registrations = Registration.objects.filter(session=session)
-            total_registrations = registrations.count()
-            paid_registrations = registrations.filter(payment_status='Paid').count()
-            revenue = paid_registrations * session.price
-            remaining_capacity = session.max_attendees - total_registrations
-            
+        for row in rows:
+            total_registrations = row['total_registrations'] or 0
             data.append({
-                "session": session.session_name,
+                "id": row['id'],
+                "session": row['session_name'],
+                "conference": row['conference_id'],
                 "total_registrations": total_registrations,
-                "remaining_capacity": max(0, remaining_capacity),
-                "revenue": revenue
+                "paid_registrations": row['paid_registrations'] or 0,
+                "remaining_capacity": max(0, row['max_attendees'] - total_registrations),
+                "revenue": row['revenue'] or 0
             })
+
+        if page is not None:
+            return self.get_paginated_response(data)
         return Response(data)
+
+class RevenueReportView(generics.GenericAPIView):
+    """
+    Revenue summed in SQL. ?group_by=conference,session,day,payment_status (comma-separated,
+    default conference), optional ?conference=<id>, ?date_from= and ?date_to= on registration date.
+    """
+
+    @cache_response('registration', 'session', 'conference')
+    def get(self, request):
+        group_by = [name.strip() for name in request.query_params.get('group_by', 'conference').split(',') if name.strip()]
+        unknown = [name for name in group_by if name not in REVENUE_GROUPINGS]
+        if not group_by or unknown:
+            raise ValidationError({'group_by': [f"Choose from: {', '.join(REVENUE_GROUPINGS)}."]})
+        conference_id = request.query_params.get('conference')
+        if conference_id and not conference_id.isdigit():
+            raise ValidationError({'conference': ["A valid integer is required."]})
+
+        queryset = revenue_breakdown(
+            group_by=group_by,
+            date_from=parse_date_param(request, 'date_from'),
+            date_to=parse_date_param(request, 'date_to'),
+            conference_id=conference_id or None,
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(list(queryset))
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import APIRequestLogViewSet
+from .views import APIRequestLogViewSet, CacheStatsView, MetricsView
 
 router = DefaultRouter()
 router.register(r'logs', APIRequestLogViewSet, basename='apirequestlog')
 
 urlpatterns = [
+    path('core/cache/', CacheStatsView.as_view(), name='cache-stats'),
+    path('core/metrics/', MetricsView.as_view(), name='metrics'),
     path('core/', include(router.urls)), # Exposes api/v1/core/logs/
 ]
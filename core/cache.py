@@ -0,0 +1,169 @@
+"""
+Response caching for read endpoints.
+
+Views opt in with @cache_response('conference', 'session', ...): the scopes
+name the models the response is built from. Each scope has a version number
+in the cache, and a response is stored under a key that embeds the current
+versions of its scopes plus the URL, sorted query parameters and user.
+invalidate(scope) bumps a version, which orphans exactly the entries built
+from that model; they then expire on their own.
+"""
+import functools
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date, urlencode
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',         # entry in CACHES
+    'TIMEOUT': 300,             # seconds
+    'KEY_PREFIX': 'response',
+}
+
+
+# Stored with each entry so conditional requests can be answered from the cache
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def get_cache_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'RESPONSE_CACHE', {}))
+    return config
+
+
+class CacheCounters:
+    """Per-view hit/miss counts for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, view, outcome):
+        with self._lock:
+            counts = self._counts.setdefault(view, {'hits': 0, 'misses': 0})
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {view: dict(counts) for view, counts in sorted(self._counts.items())}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+counters = CacheCounters()
+
+
+def _version_key(config, scope):
+    return f"{config['KEY_PREFIX']}:version:{scope}"
+
+
+def _versions(cache, config, scopes):
+    keys = [_version_key(config, scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A fresh (or evicted) version starts at the clock so old entries can never match it
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def invalidate(*scopes):
+    """
+    Drop every cached response built from the given scopes. Inside a
+    transaction the versions are bumped again on commit, so a response
+    cached from pre-commit data in between is orphaned as well.
+    """
+    config = get_cache_config()
+    if not config['ENABLED']:
+        return
+    _bump(caches[config['ALIAS']], config, scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump(caches[config['ALIAS']], config, scopes))
+
+
+def _bump(cache, config, scopes):
+    for scope in scopes:
+        key = _version_key(config, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def response_cache_key(request, view_name, scopes):
+    config = get_cache_config()
+    user = request.user.pk if request.user.is_authenticated else 'anon'
+    params = urlencode(sorted((name, sorted(values)) for name, values in request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.build_absolute_uri(request.path)}?{params}".encode('utf-8')).hexdigest()
+    versions = '.'.join(_versions(caches[config['ALIAS']], config, scopes))
+    return f"{config['KEY_PREFIX']}:{view_name}:{versions}:{user}:{digest}"
+
+
+def _stream_into_cache(content, entry, cache, key, timeout):
+    """Pass streamed chunks through unchanged, storing the full body once it completes."""
+    chunks = []
+    for chunk in content:
+        chunks.append(chunk)
+        yield chunk
+    cache.set(key, entry + (b''.join(chunks),), timeout)
+
+
+def cache_response(*scopes, timeout=None):
+    """
+    Cache a GET handler's 200 responses. DRF responses are stored as their
+    data (still negotiated and rendered per request); streaming responses
+    as their bytes. ETag / Last-Modified headers are kept with the entry, so
+    a matching If-None-Match is answered with 304 straight from the cache.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            config = get_cache_config()
+            if not config['ENABLED'] or request.method != 'GET':
+                return handler(self, request, *args, **kwargs)
+            cache = caches[config['ALIAS']]
+            view_name = f"{type(self).__name__}.{handler.__name__}"
+            key = response_cache_key(request, view_name, scopes)
+
+            cached = cache.get(key)
+            if cached is not None:
+                counters.record(view_name, 'hits')
+                kind, status_code, headers, *payload = cached
+                last_modified = headers.get('Last-Modified')
+                response = get_conditional_response(
+                    request, etag=headers.get('ETag'), last_modified=last_modified and parse_http_date(last_modified)
+                )
+                if response is None:
+                    if kind == 'data':
+                        response = Response(payload[0], status=status_code)
+                    else:
+                        response = HttpResponse(payload[1], content_type=payload[0], status=status_code)
+                for name, value in headers.items():
+                    response[name] = value
+                response['X-Cache'] = 'HIT'
+                return response
+
+            counters.record(view_name, 'misses')
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                entry_timeout = timeout if timeout is not None else config['TIMEOUT']
+                headers = {name: response[name] for name in VALIDATOR_HEADERS if response.has_header(name)}
+                if isinstance(response, Response):
+                    cache.set(key, ('data', response.status_code, headers, response.data), entry_timeout)
+                elif isinstance(response, StreamingHttpResponse):
+                    entry = ('content', response.status_code, headers, response['Content-Type'])
+                    response.streaming_content = _stream_into_cache(response.streaming_content, entry, cache, key, entry_timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,116 @@
+"""
+Conditional requests (ETag / Last-Modified) for list and detail endpoints.
+
+Validators come from one aggregate query over the queryset behind the
+response: its row count and max(updated_at), plus the same for related rows
+that appear in the payload (e.g. a session's conference name). A matching
+If-None-Match / If-Modified-Since returns 304 before anything is
+serialized, and If-Match / If-Unmodified-Since on PUT/PATCH turn a lost
+update into 412 Precondition Failed.
+
+Collections only get an ETag: removing a row can leave max(updated_at)
+unchanged or move it backwards, so a Last-Modified date would answer
+If-Modified-Since with a stale 304. The row count in the ETag catches it.
+For a single object, soft-deleted related rows still count towards
+Last-Modified (a soft delete bumps their updated_at).
+"""
+import functools
+import hashlib
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The resource has been modified since it was last fetched.'
+    default_code = 'precondition_failed'
+
+
+def queryset_validators(queryset, related=()):
+    """
+    (etag, last_modified, row count) for a queryset from a single aggregate
+    query. `related` lists (lookup, filter) pairs whose rows are part of the payload.
+    """
+    aggregates = {'total': Count('pk', distinct=True), 'latest': Max('updated_at')}
+    for i, (lookup, condition) in enumerate(related):
+        aggregates[f'total_{i}'] = Count(lookup, distinct=True, filter=condition)
+        # Unfiltered, so soft-deleting a related row moves the date forward
+        aggregates[f'latest_{i}'] = Max(f'{lookup}__updated_at')
+    values = queryset.order_by().aggregate(**aggregates)
+
+    parts = [queryset.model._meta.label_lower]
+    parts.extend(f"{name}={values[name].isoformat() if hasattr(values[name], 'isoformat') else values[name]}"
+                 for name in sorted(values))
+    etag = quote_etag(hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest())
+    stamps = [value for name, value in values.items() if name.startswith('latest') and value is not None]
+    return etag, (int(max(stamps).timestamp()) if stamps else None), values['total']
+
+
+def conditional_response(get_queryset):
+    """
+    Answer conditional GETs for a view handler. `get_queryset(view)` returns
+    the queryset the response is built from; related rows are taken from the
+    view's `conditional_related`.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            queryset = get_queryset(self)
+            etag, last_modified, total = queryset_validators(queryset, getattr(self, 'conditional_related', ()))
+            if not total and 'pk' in kwargs:
+                # Let the handler produce its 404
+                return handler(self, request, *args, **kwargs)
+            if 'pk' not in kwargs:
+                last_modified = None
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return not_modified
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+class ConditionalUpdateMixin:
+    """
+    Honour If-Match / If-Unmodified-Since on PUT and PATCH against the detail
+    ETag. The precondition is checked early in get_object() to fail fast, and
+    again with the row locked in the transaction that saves it, so two writers
+    holding the same ETag cannot both pass.
+    """
+    conditional_related = ()
+
+    def has_preconditions(self):
+        request = self.request
+        return request.method in ('PUT', 'PATCH') and (
+            'HTTP_IF_MATCH' in request.META or 'HTTP_IF_UNMODIFIED_SINCE' in request.META
+        )
+
+    def check_preconditions(self, pk):
+        etag, last_modified, _ = queryset_validators(self.get_queryset().filter(pk=pk), self.conditional_related)
+        if get_conditional_response(self.request, etag=etag, last_modified=last_modified) is not None:
+            raise PreconditionFailed()
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.has_preconditions():
+            self.check_preconditions(instance.pk)
+        return instance
+
+    def perform_update(self, serializer):
+        if not self.has_preconditions():
+            return super().perform_update(serializer)
+        instance = serializer.instance
+        with transaction.atomic():
+            # Lock first: a writer that got here with the same ETag waits, then sees the new validators
+            list(type(instance).objects.select_for_update().filter(pk=instance.pk).values_list('pk'))
+            self.check_preconditions(instance.pk)
+            super().perform_update(serializer)
@@ -0,0 +1,184 @@
+import atexit
+import logging
+import queue
+import random
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MODE': 'sync',             # 'sync' writes inline, 'buffered' hands rows to the background writer
+    'QUEUE_SIZE': 10000,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,      # seconds
+    'OVERFLOW_POLICY': 'drop',  # 'drop', 'sample' or 'block'
+    'SAMPLE_THRESHOLD': 0.5,    # queue fill ratio at which 'sample' starts thinning entries
+    'SAMPLE_RATE': 0.1,
+    'BLOCK_TIMEOUT': 0.05,      # seconds a request may wait for room under 'block'
+    'POLICIES': [],             # ordered sampling / capture rules, see core.log_policy
+    'SAMPLING': {},             # shorthand: path prefix -> share of requests logged (longest prefix wins)
+    'CAPTURE': 'truncated',     # capture mode when no policy matches: 'headers', 'truncated' or 'full'
+    'MAX_BODY_BYTES': 5000,     # body bytes kept under 'truncated'
+    'RETENTION_DAYS': 30,       # archive_request_logs moves older rows to ARCHIVE_DIR
+    'ARCHIVE_DIR': 'log_archive',
+    'ARCHIVE_CHUNK_SIZE': 5000,
+    'DELETE_BATCH_SIZE': 1000,
+}
+
+
+def get_logging_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'API_REQUEST_LOGGING', {}))
+    return config
+
+
+# Put on the queue by stop() to wake the writer thread
+_WAKE = object()
+
+
+class RequestLogBuffer:
+    """
+    Bounded in-process queue of unsaved APIRequestLog rows.
+    A daemon thread flushes them with bulk_create whenever BATCH_SIZE rows
+    are waiting or FLUSH_INTERVAL seconds have passed, and drains on exit.
+    """
+
+    def __init__(self, queue_size=10000, batch_size=200, flush_interval=2.0,
+                 overflow_policy='drop', sample_threshold=0.5, sample_rate=0.1, block_timeout=0.05):
+        if overflow_policy not in ('drop', 'sample', 'block'):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.sample_threshold = sample_threshold
+        self.sample_rate = sample_rate
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.written = 0
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        # Counters are bumped from request threads and the writer; kept apart from
+        # _flush_lock so a request never waits for a batch insert
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_settings(cls):
+        config = get_logging_config()
+        return cls(
+            queue_size=config['QUEUE_SIZE'],
+            batch_size=config['BATCH_SIZE'],
+            flush_interval=config['FLUSH_INTERVAL'],
+            overflow_policy=config['OVERFLOW_POLICY'],
+            sample_threshold=config['SAMPLE_THRESHOLD'],
+            sample_rate=config['SAMPLE_RATE'],
+            block_timeout=config['BLOCK_TIMEOUT'],
+        )
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='api-request-log-writer', daemon=True)
+            self._thread.start()
+
+    def put(self, entry):
+        """Queue an unsaved APIRequestLog. Returns False if the entry was dropped."""
+        if self.overflow_policy == 'sample':
+            fill = self.queue.qsize() / self.queue.maxsize if self.queue.maxsize else 0
+            if fill >= self.sample_threshold and random.random() >= self.sample_rate:
+                self._count('dropped', 1)
+                return False
+        try:
+            if self.overflow_policy == 'block':
+                self.queue.put(entry, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(entry)
+        except queue.Full:
+            self._count('dropped', 1)
+            return False
+        return True
+
+    def flush(self):
+        """Write everything currently queued. Safe to call from any thread."""
+        with self._flush_lock:
+            while True:
+                batch = self._take(self.batch_size)
+                if not batch:
+                    break
+                self._write(batch)
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        try:
+            # Wake the writer instead of letting it sit out the flush interval; a full queue wakes it anyway
+            self.queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _count(self, name, amount):
+        with self._count_lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def _take(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                entry = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is not _WAKE:
+                batch.append(entry)
+        return batch
+
+    def _write(self, batch):
+        from .models import APIRequestLog
+        try:
+            APIRequestLog.objects.bulk_create(batch, batch_size=self.batch_size)
+            self._count('written', len(batch))
+        except Exception as e:
+            logger.error(f"Error writing {len(batch)} request logs: {e}")
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stop.is_set():
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                entry = self.queue.get(timeout=timeout)
+                if entry is not _WAKE:
+                    batch.append(entry)
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    with self._flush_lock:
+                        self._write(batch)
+                    close_old_connections()
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+        if batch:
+            with self._flush_lock:
+                self._write(batch)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_log_buffer():
+    """Return the process-wide buffer, starting its writer thread on first use."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = RequestLogBuffer.from_settings()
+                _buffer.start()
+                atexit.register(_buffer.stop)
+    return _buffer
@@ -0,0 +1,89 @@
+"""
+Sampling and body-capture policy for RequestLoggingMiddleware.
+
+API_REQUEST_LOGGING['POLICIES'] is an ordered list of rules; the first one
+matching a request's path and response status decides whether it is logged
+and how much of it is kept:
+
+    'POLICIES': [
+        {'prefix': '/api/v1/reports/', 'status': '2xx', 'sample': 0.1, 'capture': 'headers'},
+        {'prefix': '/api/v1/', 'status': ['4xx', '5xx'], 'capture': 'full'},
+    ]
+
+`status` is a code, a class such as '5xx', or a list of either (omit it to
+match every status). Capture modes:
+
+    'headers'    headers only, no bodies
+    'truncated'  bodies cut to MAX_BODY_BYTES (the default)
+    'full'       complete bodies and headers
+
+Bodies are sliced as bytes and only the kept part is decoded, so a large
+report page is never copied or decoded just to be thrown away.
+"""
+import random
+from django.core.exceptions import ImproperlyConfigured
+
+CAPTURE_MODES = ('headers', 'truncated', 'full')
+
+# Never written to the log table
+REDACTED_HEADERS = {'authorization', 'cookie', 'set-cookie', 'proxy-authorization'}
+
+
+class LogPolicy:
+    def __init__(self, prefix='', status=None, sample=1.0, capture='truncated'):
+        if capture not in CAPTURE_MODES:
+            raise ImproperlyConfigured(f"Unknown request log capture mode: {capture}")
+        self.prefix = prefix
+        self.status = [status] if isinstance(status, (int, str)) else list(status or [])
+        self.sample = sample
+        self.capture = capture
+
+    def matches(self, path, status_code):
+        if not path.startswith(self.prefix):
+            return False
+        return not self.status or any(_status_matches(rule, status_code) for rule in self.status)
+
+    def sampled(self):
+        return self.sample >= 1 or random.random() < self.sample
+
+
+def _status_matches(rule, status_code):
+    if isinstance(rule, str) and rule.lower().endswith('xx'):
+        return str(status_code).startswith(rule[:-2])
+    return int(rule) == status_code
+
+
+def load_policies(config):
+    """
+    Build the ordered policy list: POLICIES first, then the SAMPLING
+    shorthand (longest prefix first), then a catch-all using CAPTURE.
+    """
+    policies = [LogPolicy(**rule) for rule in config['POLICIES']]
+    sampling = config['SAMPLING']
+    policies.extend(
+        LogPolicy(prefix=prefix, sample=sampling[prefix], capture=config['CAPTURE'])
+        for prefix in sorted(sampling, key=len, reverse=True)
+    )
+    policies.append(LogPolicy(capture=config['CAPTURE']))
+    return policies
+
+
+def get_policy(policies, path, status_code):
+    return next(policy for policy in policies if policy.matches(path, status_code))
+
+
+def read_body(content, capture, limit):
+    """Decode the part of `content` (bytes) the capture mode keeps."""
+    if capture == 'headers':
+        return ''
+    if capture == 'truncated':
+        # A multi-byte character cut at the limit is dropped rather than failing the whole body
+        return content[:limit].decode('utf-8', 'ignore')
+    return content.decode('utf-8')
+
+
+def capture_headers(request, response):
+    return {
+        'request': {name: value for name, value in request.headers.items() if name.lower() not in REDACTED_HEADERS},
+        'response': {name: value for name, value in response.items() if name.lower() not in REDACTED_HEADERS},
+    }
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from core.log_buffer import get_logging_config
+from core.retention import archive_request_logs
+
+class Command(BaseCommand):
+    help = 'Moves API request logs older than the retention window to gzipped NDJSON files (one per day) and deletes them'
+
+    def add_arguments(self, parser):
+        config = get_logging_config()
+        parser.add_argument('--days', type=int, default=config['RETENTION_DAYS'], help='Keep logs newer than this many days')
+        parser.add_argument('--archive-dir', default=config['ARCHIVE_DIR'])
+        parser.add_argument('--chunk-size', type=int, default=config['ARCHIVE_CHUNK_SIZE'], help='Rows read and archived per query')
+        parser.add_argument('--batch-size', type=int, default=config['DELETE_BATCH_SIZE'], help='Rows removed per DELETE statement')
+        parser.add_argument('--no-delete', action='store_true', help='Write the archive files but keep the rows')
+
+    def handle(self, *args, **options):
+        metrics = archive_request_logs(
+            days=options['days'],
+            archive_dir=options['archive_dir'],
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            delete=not options['no_delete'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+        for path in metrics['files']:
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {metrics['archived']} logs older than {metrics['before']} "
+            f"({metrics['deleted']} deleted) in {metrics['seconds']}s."
+        ))
@@ -0,0 +1,197 @@
+"""
+Per-route request metrics in Prometheus text format.
+
+MetricsMiddleware times every API request and counts its database queries
+through connection.execute_wrapper. Serializers using TimedSerializerMixin
+and CustomJSONRenderer add their time to the request in flight (tracked in
+a context variable). Each finished request is folded into in-process
+histograms labelled by route (the URL name, e.g. "conference-list") and
+method; /api/v1/core/metrics/ exposes them together with the response
+cache counters.
+
+Histograms live in memory per process: with several workers, scrape each
+one or aggregate in Prometheus. Streaming responses are measured up to the
+point the response is returned, not while the body is sent.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from rest_framework import serializers
+
+DEFAULTS = {
+    'ENABLED': True,
+    'DURATION_BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),  # seconds
+    'QUERY_BUCKETS': (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def get_metrics_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'METRICS', {}))
+    return config
+
+
+class RequestMetrics:
+    """Measurements for one request in flight."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+@contextmanager
+def track_request():
+    """Make a fresh RequestMetrics the current one for the duration of the block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name):
+    """Add the block's duration to `name` on the current request, if one is being tracked."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.phases[name] += time.perf_counter() - started
+
+
+class TimedSerializerMixin:
+    """Count the time spent turning rows into data as the request's 'serialize' phase."""
+
+    def to_representation(self, instance):
+        parent = self.parent
+        # Only top-level rows: nested serializers are already inside their parent's time
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            with phase('serialize'):
+                return super().to_representation(instance)
+        return super().to_representation(instance)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = {'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0}
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series['buckets'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['buckets']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(labels + (('le', '+Inf'),))} {series['count']}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(series['sum'])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series['count']}")
+        return lines
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Process-wide histograms and request counts, keyed by route and method."""
+
+    def __init__(self, duration_buckets=DEFAULTS['DURATION_BUCKETS'], query_buckets=DEFAULTS['QUERY_BUCKETS']):
+        self._lock = threading.Lock()
+        self.duration_buckets = duration_buckets
+        self.query_buckets = query_buckets
+        self.reset()
+
+    @classmethod
+    def from_settings(cls):
+        config = get_metrics_config()
+        return cls(duration_buckets=config['DURATION_BUCKETS'], query_buckets=config['QUERY_BUCKETS'])
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.histograms = {
+                'duration': Histogram('api_request_duration_seconds', 'Wall time of API requests.', self.duration_buckets),
+                'queries': Histogram('api_request_db_queries', 'Database queries per API request.', self.query_buckets),
+                'db': Histogram('api_request_db_duration_seconds', 'Time spent in database queries per API request.', self.duration_buckets),
+                'serialize': Histogram('api_request_serialize_duration_seconds', 'Time spent in serializers per API request.', self.duration_buckets),
+                'render': Histogram('api_request_render_duration_seconds', 'Time spent rendering the response body per API request.', self.duration_buckets),
+            }
+
+    def record(self, route, method, status_code, seconds, metrics):
+        labels = (('route', route), ('method', method))
+        with self._lock:
+            key = labels + (('status', str(status_code)),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.histograms['duration'].observe(labels, seconds)
+            self.histograms['queries'].observe(labels, metrics.queries)
+            self.histograms['db'].observe(labels, metrics.db_seconds)
+            for name, value in metrics.phases.items():
+                self.histograms[name].observe(labels, value)
+
+    def exposition(self, cache_counts=None):
+        """The registry (plus optional response cache counts per view) as Prometheus text."""
+        with self._lock:
+            lines = ['# HELP api_requests_total API requests by route, method and status.', '# TYPE api_requests_total counter']
+            lines.extend(f"api_requests_total{_labels(key)} {count}" for key, count in sorted(self.requests.items()))
+            for histogram in self.histograms.values():
+                lines.extend(histogram.exposition())
+        if cache_counts is not None:
+            lines.extend(['# HELP api_response_cache_total Response cache lookups by view and outcome.', '# TYPE api_response_cache_total counter'])
+            for view, counts in cache_counts.items():
+                for outcome, count in sorted(counts.items()):
+                    lines.append(f"api_response_cache_total{_labels((('view', view), ('outcome', outcome)))} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry.from_settings()
+
+
+def route_name(request):
+    """Low-cardinality route label: the URL name, or the route pattern when unnamed."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unmatched>'
+    return match.view_name or match.route
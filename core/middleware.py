@@ -1,47 +1,90 @@
 import json
 import logging
 import time
+from django.db import connection
 from django.utils.deprecation import MiddlewareMixin
 from .models import APIRequestLog
+from .log_buffer import get_log_buffer, get_logging_config
+from .metrics import get_metrics_config, registry, route_name, track_request
+from .log_policy import capture_headers, get_policy, load_policies, read_body
 
 logger = logging.getLogger(__name__)
 
 class RequestLoggingMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        request.start_time = time.time()
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # 'buffered' hands entries to core.log_buffer instead of inserting inline
+        config = get_logging_config()
+        self.buffered = config['MODE'] == 'buffered'
+        self.policies = load_policies(config)
+        self.max_body = config['MAX_BODY_BYTES']
 
     def process_response(self, request, response):
         if request.path.startswith('/api/'):
             try:
+                # Decided before any body is read, so unsampled requests cost nothing
+                policy = get_policy(self.policies, request.path, response.status_code)
+                if not policy.sampled():
+                    return response
                 # Attempt to parse body (only works if not consumed, or if DRF didn't consume it yet via stream)
                 # DRF views access request.data, so request.body might differ or be unavailable if stream consumed.
                 # Use a safe way.
                 request_payload = ''
-                if request.method in ['POST', 'PUT', 'PATCH']:
+                if request.method in ['POST', 'PUT', 'PATCH'] and policy.capture != 'headers':
                     try:
                         if request.content_type == 'application/json':
-                            request_payload = request.body.decode('utf-8')
+                            request_payload = read_body(request.body, policy.capture, self.max_body)
                         else:
                             request_payload = str(request.POST.dict())
+                            if policy.capture == 'truncated':
+                                request_payload = request_payload[:self.max_body]
                     except Exception:
                         request_payload = '<Could not read payload>'
                 
                 response_payload = ''
                 # Only log response if it's text/json
-                if 'application/json' in response.get('Content-Type', ''):
+                # Streaming responses are logged without a body
+                if not response.streaming and 'application/json' in response.get('Content-Type', ''):
                     try:
-                        response_payload = response.content.decode('utf-8')
+                        # A rendered response holds a single bytes chunk, so .content is not a copy
+                        response_payload = read_body(response.content, policy.capture, self.max_body)
                     except Exception:
                         response_payload = '<Could not decode response>'
                 
-                APIRequestLog.objects.create(
+                entry = APIRequestLog(
                     api_endpoint=request.path,
                     method=request.method,
-                    request_body=request_payload[:5000], # Trucate if too long
-                    response_body=response_payload[:5000],
-                    status_code=response.status_code
+                    request_body=request_payload,
+                    response_body=response_payload,
+                    status_code=response.status_code,
+                    headers=capture_headers(request, response) if policy.capture != 'truncated' else None,
                 )
+                if self.buffered:
+                    get_log_buffer().put(entry)
+                else:
+                    entry.save()
             except Exception as e:
                 logger.error(f"Error logging request: {e}")
         
         return response
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, query count/time and serializer/render time of API
+    requests into core.metrics. Listed last in MIDDLEWARE so the request
+    log's own writes are not counted against the endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = get_metrics_config()['ENABLED']
+
+    def __call__(self, request):
+        if not self.enabled or not request.path.startswith('/api/'):
+            return self.get_response(request)
+        started = time.perf_counter()
+        with track_request() as metrics, connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        registry.record(route_name(request), request.method, response.status_code, time.perf_counter() - started, metrics)
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_apirequestlog_method'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apirequestlog',
+            index=models.Index(fields=['created_at', 'id'], name='apirequestlog_keyset_idx'),
+        ),
+    ]
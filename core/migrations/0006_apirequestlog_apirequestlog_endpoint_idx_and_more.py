@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_apirequestlog_apirequestlog_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apirequestlog',
+            index=models.Index(fields=['api_endpoint', 'created_at'], name='apirequestlog_endpoint_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apirequestlog',
+            index=models.Index(fields=['status_code', 'created_at'], name='apirequestlog_status_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_apirequestlog_apirequestlog_endpoint_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apirequestlog',
+            name='headers',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
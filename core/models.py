@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -11,6 +12,8 @@ class BaseModel(models.Model):
         abstract = True
 
 class APIRequestLog(BaseModel):
+    # Stamped when the entry is built, not when a buffered batch is written (core.log_buffer)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     api_endpoint = models.CharField(max_length=255)
     METHOD_CHOICES = [
         ('GET', 'GET'),
@@ -23,9 +26,18 @@ class APIRequestLog(BaseModel):
     request_body = models.TextField(blank=True, null=True) # Renamed from request_payload to match spec
     response_body = models.TextField(blank=True, null=True) # Renamed from response_payload to match spec
     status_code = models.IntegerField()
+    # Request/response headers, kept under the 'headers' and 'full' capture policies (core.log_policy)
+    headers = models.JSONField(blank=True, null=True)
     # timestamp field is redundant with created_at from BaseModel, but I will keep created_at as the source of truth or keep generic timestamp.
     # User spec says "API Log ... fields ... timestamps". 
     # BaseModel has created_at. I'll use that.
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='apirequestlog_keyset_idx'),
+            models.Index(fields=['api_endpoint', 'created_at'], name='apirequestlog_endpoint_idx'),
+            models.Index(fields=['status_code', 'created_at'], name='apirequestlog_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.method} {self.api_endpoint} - {self.status_code}"
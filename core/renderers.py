@@ -1,13 +1,75 @@
+import json
+from django.conf import settings
 from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from .metrics import phase
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DEFAULTS = {
+    'MODE': 'fast',     # 'fast' writes the envelope as bytes around the encoded data, 'standard' builds an envelope dict
+    'ENGINE': 'auto',   # 'auto'/'orjson' use orjson when installed, 'stdlib' always uses json
+}
+
+SUCCESS_PREFIX = b'{"status":"success","message":"Operation successful","data":'
+
+
+def get_renderer_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'API_RENDERER', {}))
+    return config
+
+
+_stdlib_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+_orjson_options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson is not None else 0
+
+
+def _escape_separators(content):
+    # Same as JSONRenderer: keep the output a strict JavaScript subset
+    if b'\xe2\x80' in content:
+        content = content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+    return content
+
+
+def encode_json(data, engine='auto'):
+    """
+    Compact UTF-8 JSON bytes, matching JSONRenderer's output for what
+    serializers produce. orjson handles datetime/date/UUID natively and falls
+    back to DRF's encoder for Decimal, lazy strings, querysets and the like.
+    """
+    if orjson is not None and engine in ('auto', 'orjson'):
+        return _escape_separators(orjson.dumps(data, default=_stdlib_encoder.default, option=_orjson_options))
+    return _escape_separators(_stdlib_encoder.encode(data).encode('utf-8'))
+
 
 class CustomJSONRenderer(JSONRenderer):
+    # None reads API_RENDERER from settings
+    mode = None
+    engine = None
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return self._render(data, accepted_media_type, renderer_context)
+
+    def _render(self, data, accepted_media_type=None, renderer_context=None):
         status_code = renderer_context['response'].status_code
-        
+        config = get_renderer_config()
+        config.update({name: value for name, value in (('MODE', self.mode), ('ENGINE', self.engine)) if value})
+        # Pretty-printing (browsable API, ?indent) keeps the stdlib path
+        fast = config['MODE'] == 'fast' and self.get_indent(accepted_media_type, renderer_context or {}) is None
+
         # If data is already standardized (e.g. by exception handler), use it as is
         if isinstance(data, dict) and 'status' in data and 'message' in data:
+             if fast:
+                 return encode_json(data, config['ENGINE'])
              return super().render(data, accepted_media_type, renderer_context)
 
+        if fast and str(status_code).startswith('2'):
+            return SUCCESS_PREFIX + encode_json(data, config['ENGINE']) + b'}'
+
         response_data = {
             'status': 'success',
             'message': 'Operation successful',
@@ -22,8 +84,25 @@ class CustomJSONRenderer(JSONRenderer):
                  response_data['message'] = data['detail']
             elif isinstance(data, dict):
                  # Pass through validation errors or other info as data or errors
-                 # But ideally structure should be consistent. 
+                 # But ideally structure should be consistent.
                  # For now, let's put it in data key if it's not standard
                  response_data['data'] = data
-            
+
+        if fast:
+            return encode_json(response_data, config['ENGINE'])
         return super().render(response_data, accepted_media_type, renderer_context)
+
+
+def stream_json_envelope(rows, message='Operation successful'):
+    """
+    Yield the standard success envelope around a list, one row at a time,
+    so large reports can be sent through a StreamingHttpResponse.
+    """
+    engine = get_renderer_config()['ENGINE']
+    yield ('{"status":"success","message":%s,"data":[' % json.dumps(message)).encode('utf-8')
+    first = True
+    for row in rows:
+        chunk = encode_json(row, engine)
+        yield chunk if first else b',' + chunk
+        first = False
+    yield b']}'
@@ -0,0 +1,87 @@
+"""
+Retention for APIRequestLog.
+
+Rows older than the retention window are written, oldest first, to one
+gzip-compressed NDJSON file per day (api-request-logs-YYYY-MM-DD.ndjson.gz)
+and then deleted in small batches so no single statement holds long locks.
+Each chunk is appended to its files as a complete gzip member and closed
+before its rows are deleted: an interrupted run loses nothing, and at worst
+re-archives the last chunk on the next run.
+"""
+import gzip
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db.models import Q
+from django.utils import timezone
+from .log_buffer import get_logging_config
+from .models import APIRequestLog
+from .renderers import encode_json
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'created_at', 'method', 'api_endpoint', 'status_code', 'ip_address', 'request_body', 'response_body', 'headers',
+)
+
+
+def archive_path(archive_dir, day):
+    return os.path.join(archive_dir, f"api-request-logs-{day.isoformat()}.ndjson.gz")
+
+
+def _old_rows(before, chunk_size):
+    """Yield chunks of rows created before `before`, walking the (created_at, id) index."""
+    queryset = APIRequestLog.objects.filter(created_at__lt=before).order_by('created_at', 'id')
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = queryset.filter(Q(created_at__gt=last[0]) | Q(created_at=last[0], id__gt=last[1]))
+        rows = list(chunk.values(*ARCHIVE_FIELDS)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+def archive_request_logs(days=None, archive_dir=None, chunk_size=None, batch_size=None, delete=True, log=None):
+    """
+    Archive and delete request logs older than `days`. Arguments default to
+    API_REQUEST_LOGGING. Returns counts and timing for the run.
+    """
+    config = get_logging_config()
+    days = config['RETENTION_DAYS'] if days is None else days
+    archive_dir = str(archive_dir or config['ARCHIVE_DIR'])
+    chunk_size = chunk_size or config['ARCHIVE_CHUNK_SIZE']
+    batch_size = batch_size or config['DELETE_BATCH_SIZE']
+    before = timezone.now() - timedelta(days=days)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    started = time.monotonic()
+    metrics = {'before': before.isoformat(), 'archived': 0, 'deleted': 0, 'chunks': 0, 'files': set()}
+    for rows in _old_rows(before, chunk_size):
+        by_day = defaultdict(list)
+        for row in rows:
+            by_day[row['created_at'].astimezone(dt_timezone.utc).date()].append(row)
+        for day, day_rows in by_day.items():
+            path = archive_path(archive_dir, day)
+            with gzip.open(path, 'ab') as archive:
+                archive.writelines(encode_json(row) + b'\n' for row in day_rows)
+            metrics['files'].add(path)
+        metrics['archived'] += len(rows)
+        metrics['chunks'] += 1
+
+        if delete:
+            ids = [row['id'] for row in rows]
+            for start in range(0, len(ids), batch_size):
+                deleted, _ = APIRequestLog.objects.filter(pk__in=ids[start:start + batch_size]).delete()
+                metrics['deleted'] += deleted
+        if log:
+            log(f"Chunk {metrics['chunks']}: archived {metrics['archived']} rows so far")
+
+    metrics['files'] = sorted(metrics['files'])
+    metrics['seconds'] = round(time.monotonic() - started, 3)
+    logger.info("Archived %s request logs older than %s", metrics['archived'], before)
+    return metrics
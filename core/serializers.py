@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from .metrics import TimedSerializerMixin
 from .models import APIRequestLog
 
-class APIRequestLogSerializer(serializers.ModelSerializer):
+class APIRequestLogSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = APIRequestLog
-        fields = ['id', 'api_endpoint', 'method', 'request_body', 'response_body', 'status_code', 'created_at', 'ip_address']
+        fields = ['id', 'api_endpoint', 'method', 'request_body', 'response_body', 'status_code', 'headers', 'created_at', 'ip_address']
@@ -1,3 +1,218 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, modify_settings, override_settings
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from conferences.models import Conference
+from .log_buffer import RequestLogBuffer
+from .log_policy import LogPolicy, get_policy, load_policies
+from .metrics import registry
+from .models import APIRequestLog
+from .renderers import CustomJSONRenderer
+from .retention import archive_request_logs
 
-# Create your tests here.
+
+def log_entry(i=0):
+    return APIRequestLog(api_endpoint=f'/api/v1/sessions/{i}/', method='GET', status_code=200)
+
+
+class RecordingBuffer(RequestLogBuffer):
+    """Records batch sizes instead of writing, so the writer thread needs no database."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+        self.wrote = threading.Event()
+
+    def _write(self, batch):
+        self.batches.append(len(batch))
+        self._count('written', len(batch))
+        self.wrote.set()
+
+
+class RequestLogBufferTests(SimpleTestCase):
+
+    def test_flushes_when_batch_is_full(self):
+        buffer = RecordingBuffer(batch_size=3, flush_interval=60)
+        buffer.start()
+        for i in range(3):
+            buffer.put(log_entry(i))
+        self.assertTrue(buffer.wrote.wait(5))
+        buffer.stop()
+        self.assertEqual(buffer.batches, [3])
+
+    def test_flushes_after_interval(self):
+        buffer = RecordingBuffer(batch_size=100, flush_interval=0.05)
+        buffer.start()
+        buffer.put(log_entry())
+        self.assertTrue(buffer.wrote.wait(5))
+        buffer.stop()
+        self.assertEqual(buffer.batches, [1])
+
+    def test_drops_when_queue_is_full(self):
+        buffer = RecordingBuffer(queue_size=2)
+        self.assertEqual([buffer.put(log_entry(i)) for i in range(3)], [True, True, False])
+        self.assertEqual(buffer.dropped, 1)
+
+
+class RequestLogBufferWriteTests(TestCase):
+
+    def test_stop_drains_with_request_time(self):
+        buffer = RequestLogBuffer(batch_size=2)
+        entries = [log_entry(i) for i in range(3)]
+        # Built a while ago: the stored time must be the request's, not the flush's
+        stamped = entries[0].created_at - timedelta(minutes=5)
+        for entry in entries:
+            entry.created_at = stamped
+            buffer.put(entry)
+        buffer.stop()
+        self.assertEqual(buffer.written, 3)
+        self.assertEqual(list(APIRequestLog.objects.values_list('created_at', flat=True).distinct()), [stamped])
+
+
+@override_settings(API_REQUEST_LOGGING={'MODE': 'buffered'})
+class BufferedRequestLoggingTests(TestCase):
+
+    def test_middleware_queues_rows_for_the_writer(self):
+        # Never started: flushed on the test thread so the rows land in the test transaction
+        buffer = RequestLogBuffer()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='tester', password='secret'))
+        with mock.patch('core.middleware.get_log_buffer', return_value=buffer):
+            client.get('/api/v1/conferences/')
+            client.get('/api/v1/sessions/')
+        self.assertFalse(APIRequestLog.objects.exists())
+        buffer.flush()
+        self.assertEqual(
+            list(APIRequestLog.objects.order_by('id').values_list('api_endpoint', flat=True)),
+            ['/api/v1/conferences/', '/api/v1/sessions/']
+        )
+
+
+class RendererTests(SimpleTestCase):
+
+    def render(self, data, status_code=200, mode='fast', engine='auto'):
+        renderer = CustomJSONRenderer()
+        renderer.mode, renderer.engine = mode, engine
+        return renderer.render(data, 'application/json', {'response': Response(status=status_code)})
+
+    def test_fast_modes_match_standard_output(self):
+        payloads = [
+            ([{'price': Decimal('10.50'), 'at': datetime(2026, 1, 1, 9, tzinfo=dt_timezone.utc),
+               'day': date(2026, 1, 1), 'name': 'caf\u00e9 \u2028', 1: None}], 200),
+            ({'detail': 'Not found.'}, 404),
+            ({'status': 'error', 'message': 'Validation error', 'errors': ['bad']}, 400),
+            (None, 204),
+        ]
+        for data, status_code in payloads:
+            expected = self.render(data, status_code, mode='standard')
+            for engine in ('stdlib', 'orjson'):
+                self.assertEqual(self.render(data, status_code, engine=engine), expected)
+
+
+class RequestLogRetentionTests(TestCase):
+
+    def test_old_logs_are_archived_then_deleted(self):
+        APIRequestLog.objects.bulk_create([
+            APIRequestLog(api_endpoint=f'/api/v1/sessions/{i}/', method='GET', status_code=200) for i in range(5)
+        ])
+        old = list(APIRequestLog.objects.order_by('id').values_list('id', flat=True)[:3])
+        APIRequestLog.objects.filter(pk__in=old).update(created_at=datetime(2020, 1, 1, 12, tzinfo=dt_timezone.utc))
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            metrics = archive_request_logs(days=30, archive_dir=archive_dir, chunk_size=2, batch_size=1)
+            with gzip.open(os.path.join(archive_dir, 'api-request-logs-2020-01-01.ndjson.gz')) as archive:
+                archived = [json.loads(line)['id'] for line in archive]
+        self.assertEqual(archived, old)
+        self.assertEqual((metrics['archived'], metrics['deleted'], metrics['chunks']), (3, 3, 2))
+        self.assertFalse(APIRequestLog.objects.filter(pk__in=old).exists())
+        self.assertEqual(APIRequestLog.objects.count(), 2)
+
+
+@override_settings(API_REQUEST_LOGGING={
+    'MODE': 'sync',
+    'POLICIES': [
+        {'prefix': '/api/v1/conferences/', 'status': '4xx', 'capture': 'full'},
+        {'prefix': '/api/v1/conferences/', 'capture': 'headers'},
+        {'prefix': '/api/v1/search/', 'sample': 0},
+    ],
+    'MAX_BODY_BYTES': 20,
+})
+class RequestLogPolicyTests(TestCase):
+
+    def setUp(self):
+        self.logs = APIRequestLog.objects.order_by('-id')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='tester', password='secret'))
+
+    def test_first_matching_policy_wins(self):
+        policies = load_policies({
+            'POLICIES': [{'prefix': '/api/v1/', 'status': ['5xx', 404], 'capture': 'full'}],
+            'SAMPLING': {'/api/v1/': 0.5, '/api/v1/search/': 0.1},
+            'CAPTURE': 'truncated',
+        })
+        self.assertEqual(get_policy(policies, '/api/v1/search/', 503).capture, 'full')
+        self.assertEqual(get_policy(policies, '/api/v1/search/', 404).capture, 'full')
+        self.assertEqual(get_policy(policies, '/api/v1/search/', 200).sample, 0.1)
+        self.assertEqual(get_policy(policies, '/api/v1/sessions/', 200).sample, 0.5)
+        self.assertEqual(get_policy(policies, '/api/v2/', 200).sample, 1.0)
+        with self.assertRaises(ImproperlyConfigured):
+            LogPolicy(capture='everything')
+
+    def test_bodies_are_captured_per_policy(self):
+        self.client.get('/api/v1/sessions/')
+        self.assertEqual(len(self.logs[0].response_body.encode('utf-8')), 20)
+        self.assertIsNone(self.logs[0].headers)
+
+        self.client.get('/api/v1/conferences/')
+        self.assertEqual(self.logs[0].response_body, '')
+        self.assertEqual(self.logs[0].headers['response']['Content-Type'], 'application/json')
+        self.assertNotIn('Authorization', self.logs[0].headers['request'])
+
+        self.client.post('/api/v1/conferences/', {'conference_name': 'x' * 40}, format='json')
+        self.assertEqual(self.logs[0].status_code, 400)
+        self.assertIn('x' * 40, self.logs[0].request_body)
+
+        count = self.logs.count()
+        self.client.get('/api/v1/search/?q=anything')
+        self.assertEqual(self.logs.count(), count)
+
+
+@modify_settings(MIDDLEWARE={'remove': 'core.middleware.RequestLoggingMiddleware'})
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='secret', is_staff=True))
+
+    def test_route_histograms_in_prometheus_format(self):
+        start = date.today() + timedelta(days=30)
+        Conference.objects.create(conference_name='Metrics', start_date=start, end_date=start, location='Online')
+        # count, conferences, prefetched sessions
+        with self.assertNumQueries(3):
+            self.client.get('/api/v1/conferences/')
+
+        response = self.client.get('/api/v1/core/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode('utf-8').splitlines()
+        self.assertIn('api_requests_total{route="conference-list",method="GET",status="200"} 1', lines)
+        self.assertIn('api_request_db_queries_sum{route="conference-list",method="GET"} 3', lines)
+        self.assertIn('api_request_db_queries_bucket{route="conference-list",method="GET",le="3"} 1', lines)
+        self.assertIn('api_request_db_queries_bucket{route="conference-list",method="GET",le="2"} 0', lines)
+        self.assertIn('# TYPE api_request_render_duration_seconds histogram', lines)
+        self.assertIn('api_request_serialize_duration_seconds_count{route="conference-list",method="GET"} 1', lines)
+
+    def test_requires_admin(self):
+        self.client.force_authenticate(User.objects.create_user(username='tester', password='secret'))
+        self.assertEqual(self.client.get('/api/v1/core/metrics/').status_code, 403)
@@ -1,6 +1,15 @@
-from rest_framework import viewsets
+from django.http import HttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework import permissions, viewsets, views
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .cache import counters
+from .metrics import CONTENT_TYPE, registry
+from .exports import export_response
 from .models import APIRequestLog
 from .serializers import APIRequestLogSerializer
+from .pagination import KeysetPagination
 from django.shortcuts import render
 
 def home(request):
@@ -9,3 +18,53 @@ def home(request):
 class APIRequestLogViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = APIRequestLog.objects.all().order_by('-created_at')
     serializer_class = APIRequestLogSerializer
+    pagination_class = KeysetPagination
+
+    export_columns = [
+        ('id', 'id'), ('created_at', 'created_at'), ('method', 'method'), ('api_endpoint', 'api_endpoint'),
+        ('status_code', 'status_code'), ('ip_address', 'ip_address'),
+        ('request_body', 'request_body'), ('response_body', 'response_body'), ('headers', 'headers'),
+    ]
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream logs as NDJSON (default) or ?output=csv.
+        Filters: ?date_from= / ?date_to= (YYYY-MM-DD), ?status_code=, ?endpoint= (path prefix).
+        """
+        queryset = APIRequestLog.objects.all()
+        for name, lookup in (('date_from', 'created_at__date__gte'), ('date_to', 'created_at__date__lte')):
+            value = request.query_params.get(name)
+            if value:
+                try:
+                    parsed = parse_date(value)
+                except ValueError:
+                    parsed = None
+                if parsed is None:
+                    raise ValidationError({name: ["Enter a valid date in YYYY-MM-DD format."]})
+                queryset = queryset.filter(**{lookup: parsed})
+        status_code = request.query_params.get('status_code')
+        if status_code:
+            if not status_code.isdigit():
+                raise ValidationError({'status_code': ["A valid integer is required."]})
+            queryset = queryset.filter(status_code=status_code)
+        endpoint = request.query_params.get('endpoint')
+        if endpoint:
+            queryset = queryset.filter(api_endpoint__startswith=endpoint)
+        return export_response(request, queryset, self.export_columns, 'api-request-logs')
+
+class CacheStatsView(views.APIView):
+    """Response cache hits and misses per view, for this process."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(counters.snapshot())
+
+
+class MetricsView(views.APIView):
+    """Request latency, query and cache metrics for this process, in Prometheus text format."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        # Plain HttpResponse: scrapers expect the exposition format, not the JSON envelope
+        return HttpResponse(registry.exposition(counters.snapshot()), content_type=CONTENT_TYPE)